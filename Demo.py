@@ -1,7 +1,14 @@
 import streamlit as st 
+import datetime
 import json
 import os
-import pandas as pd
+
+from engine import datasets as dataset_io
+from engine.cache import fingerprint, results as result_cache
+from engine.store import datasets as dataset_store
+# The other engine modules are imported where the page uses them, after the first elements are sent
+from engine import registry, sqlite, warmup
+from engine.events import DAY
 
 
 st.set_page_config(
@@ -11,32 +18,276 @@ st.set_page_config(
 )
 
 
+@st.cache_resource(max_entries=32, show_spinner=False, on_release=lambda data: data.close())
+def open_in_place(vertical, path, version, backend):
+    # A DuckDB or SQLite dataset, opened once per file version and shared by all sessions
+    # instead of opening a connection on every rerun
+    data, _ = registry.VERTICALS[vertical].load(path, backend)
+    return data
+
+
 st.title('Forge Demo Datasets')
-datasets = [f for f in os.listdir('dummy_data') if f != '.DS_Store']
+datasets = {name: path for name, path in dataset_io.list_datasets('dummy_data').items() if name in registry.VERTICALS}
+warmup.start(datasets)
+
+vertical = st.selectbox('Select an app vertical', list(datasets), format_func=lambda x: x.capitalize())
 
-vertical = st.selectbox('Select an app vertical', datasets, format_func=lambda x: x.replace('.csv', '').capitalize())
+# Only read the columns and event types this vertical's strategies use
+columns = registry.VERTICALS[vertical].columns()
+event_types = registry.VERTICALS[vertical].event_types()
+vertical_partials = registry.VERTICALS[vertical].partials()
+# A directory of daily files only folds new days into its saved aggregates
+append_store = vertical_partials is not None and dataset_io.is_append_store(datasets[vertical])
+# An SQLite store is always aggregated in the database
+if append_store:
+    backend = 'pandas'
+elif sqlite.is_store(datasets[vertical]):
+    backend = 'sqlite'
+else:
+    from engine import backends
 
-df = pd.read_csv('dummy_data/'+ vertical)
-st.header(vertical.capitalize().replace('.csv', '') +  " dataset example (100k rows)")
+    backend = st.sidebar.selectbox(
+        'Compute backend', backends.BACKENDS, index=backends.BACKENDS.index(backends.default_backend()),
+        help="pandas loads the dataset into memory; duckdb runs the aggregations on the files in place.",
+    )
+stream = append_store or backend == 'pandas' and vertical_partials is not None and st.sidebar.checkbox(
+    'Streaming mode', help="Read the dataset in chunks with bounded memory instead of loading it at once."
+)
+# Approximate charts from a sample of whole users, scaled back up
+preview = not stream and backend != 'sqlite' and st.sidebar.checkbox(
+    'Sampled preview', help="Estimate the charts from a sample of users, with 95% confidence intervals."
+)
+if preview:
+    sample_rate = st.sidebar.slider('Sample rate (% of users)', min_value=1, max_value=50, value=5) / 100
+profile_strategies = not stream and not preview and st.sidebar.checkbox(
+    'Profile strategies', help="Time, profile and trace the allocations of every strategy. Results are recomputed, not read from the cache."
+)
+run_parallel = not stream and not preview and not profile_strategies and backend == 'pandas' and st.sidebar.checkbox(
+    'Run strategies in parallel', help="Compute the strategies at once, in threads of the dashboard or in a process pool sharing the dataset through shared memory."
+)
+pool = st.sidebar.radio('Run in', ['Threads', 'Processes'], horizontal=True) if run_parallel else None
+use_threads = pool == 'Threads'
+use_processes = pool == 'Processes'
+if use_threads:
+    strategy_timeout = st.sidebar.number_input('Timeout per strategy (seconds)', min_value=1, value=60)
+if use_processes:
+    workers = st.sidebar.number_input('Worker processes', min_value=1, value=os.cpu_count() or 1)
+# Charts from a small user sample first, swapped for the exact ones computed in the background
+approximate_first = False
+if not stream and not preview and backend != 'sqlite' and not profile_strategies and not run_parallel:
+    from engine import progressive
+
+    approximate_first = st.sidebar.checkbox(
+        'Approximate first', value=True,
+        help="Draw the charts from %d%% of the users right away and refine them on the full dataset in the background." % round(progressive.SAMPLE_RATE * 100),
+    )
+# Sampling hashes user_id, so it is loaded even when no strategy reads it
+extra_columns = ['user_id'] if preview else []
+footprint = None
+if stream:
+    from engine import streaming
+
+    chunksize = st.sidebar.number_input('Rows per chunk', min_value=10_000, value=1_000_000, step=100_000)
+    first = next(streaming.iter_chunks(datasets[vertical], 100, columns, event_types), None)
+    if first is None:
+        st.info("No %s events in %s to stream." % (vertical, datasets[vertical]))
+        st.stop()
+    df = registry.VERTICALS[vertical].validate(first)
+elif backend != 'pandas':
+    df = open_in_place(vertical, datasets[vertical], fingerprint(datasets[vertical]), backend)
+else:
+    # Loaded once per process and shared by all sessions; strategies get per-event-type slices from it
+    df, footprint = dataset_store.get(vertical, datasets[vertical], extra_columns, load=not approximate_first)
+    if df is None:
+        # The page reads the dataset in place with DuckDB; the refinement loads it into the store in the background
+        df = open_in_place(vertical, datasets[vertical], fingerprint(datasets[vertical]), 'duckdb')
+    else:
+        # Already in memory: the exact charts are quicker than a sample
+        approximate_first = False
+if footprint is not None:
+    st.sidebar.caption('Dataset memory: %.1f MB, %.1f MB before the dtype plan' % (footprint[1] / 2**20, footprint[0] / 2**20))
+with st.sidebar.expander('Dataset store'):
+    st.caption('%.1f MB of %.1f MB in use' % (dataset_store.frames.nbytes / 2**20, dataset_store.frames.budget / 2**20))
+    st.dataframe(dataset_store.stats(), hide_index=True)
+# Days relative to the last day of the dataset; a range is a view of the time-ordered rows
+date_range = None
+span = None if stream else df.time_range()
+if span is not None:
+    epoch = datetime.date(1970, 1, 1)
+    first_day, last_day = int(span[0] // DAY), int(span[1] // DAY)
+    choice = st.sidebar.selectbox('Date range', ['All', 'Last 7 days', 'Last 30 days', 'Custom'])
+    if choice == 'Custom':
+        days = st.sidebar.date_input(
+            'Days', value=(epoch + datetime.timedelta(first_day), epoch + datetime.timedelta(last_day)),
+            min_value=epoch + datetime.timedelta(first_day), max_value=epoch + datetime.timedelta(last_day),
+        )
+        # Half-picked ranges cover one day
+        if days:
+            date_range = ((days[0] - epoch).days, (days[-1] - epoch).days)
+    elif choice != 'All':
+        date_range = (last_day - int(choice.split()[1]) + 1, last_day)
+if date_range is not None:
+    df = df.between(date_range[0] * DAY, (date_range[1] + 1) * DAY)
+dataset_fingerprint = fingerprint(datasets[vertical])
+
+if st.sidebar.button('Clear cached results'):
+    result_cache.invalidate(dataset=dataset_fingerprint)
+st.header(vertical.capitalize() +  " dataset example (100k rows)")
 with st.expander("Show data sample", expanded=0):
     st.write(df.head(100))
 
 st.header("Strategies to explore")
 
-with open('strategies/strategies.json', 'r') as f:
-    strategies = json.load(f)
-    strategy_points = strategies[vertical.replace('.csv','')]
+strategy_points = registry.VERTICALS[vertical].goals
+vertical_funcs = registry.VERTICALS[vertical].funcs()
+variant = (columns, event_types) if date_range is None else (columns, event_types, date_range)
+if preview:
+    variant += (('sample', sample_rate),)
+cache_keys = {
+    func_name: result_cache.key(dataset_fingerprint, func, variant=variant)
+    for func_name, func in vertical_funcs.items()
+}
+
+# Streamed, parallel and DuckDB results are identical to sequential pandas ones, so they share cache entries
+missing = [name for name, key in cache_keys.items() if result_cache.get(key) is None]
+if missing and not approximate_first and not stream and not preview and warmup.wait(vertical):
+    # Computed by the warmup meanwhile
+    missing = [name for name, key in cache_keys.items() if result_cache.get(key) is None]
+# A refinement started by an earlier run for other data or settings is cancelled
+from engine import progressive
+
+refinement_key = (dataset_fingerprint, variant)
+progressive.cancel_stale(st.session_state, refinement_key if missing and approximate_first else None)
+computed = {}
+approximate = {}
+refinement = None
+threaded = None
+if missing and approximate_first:
+    from engine import sampling
+
+    # Sampled charts now (cached like the sampled preview's), exact ones from a background thread
+    funcs = {name: vertical_funcs[name] for name in missing}
+    sample_variant = variant + (('sample', progressive.SAMPLE_RATE, progressive.GROUPS),)
+    sample_keys = {name: result_cache.key(dataset_fingerprint, func, variant=sample_variant) for name, func in funcs.items()}
+    approximate = {name: result_cache.get(key) for name, key in sample_keys.items()}
+    unsampled = {name: funcs[name] for name, result in approximate.items() if result is None}
+    if unsampled:
+        for func_name, result in sampling.run(df, unsampled, progressive.SAMPLE_RATE, progressive.GROUPS).items():
+            result_cache.put(sample_keys[func_name], result)
+            approximate[func_name] = result
+
+    def load_exact():
+        # A warmup of this dataset has its results in the cache once it is done
+        warmup.wait(vertical)
+        if backend == 'pandas':
+            data, _ = dataset_store.get(vertical, datasets[vertical])
+        else:
+            # DuckDB connections are not shared across threads: the refinement opens its own
+            data, _ = registry.VERTICALS[vertical].load(datasets[vertical], backend)
+        return data if date_range is None else data.between(date_range[0] * DAY, (date_range[1] + 1) * DAY)
 
-def import_from(module, name):
-    module = __import__(module, fromlist=[name])
-    return getattr(module, name)
+    refinement = progressive.refine(st.session_state, refinement_key, load_exact, funcs, {name: cache_keys[name] for name in missing})
+elif missing and append_store:
+    from engine import incremental
 
-vertical_funcs = import_from('strategies.' + vertical.replace('.csv', ''), 'vertical_funcs')()
+    computed = incremental.AppendStore(datasets[vertical], vertical).refresh(chunksize)
+elif missing and stream:
+    computed = streaming.run(datasets[vertical], {name: vertical_partials[name] for name in missing}, columns, event_types, chunksize)
+elif missing and preview:
+    from engine import sampling
 
+    computed = sampling.run(df, {name: vertical_funcs[name] for name in missing}, sample_rate)
+elif missing and use_threads:
+    from engine import parallel
+
+    # Started now, each chart drawn as its strategy finishes
+    threaded = parallel.as_completed(df, {name: vertical_funcs[name] for name in missing}, strategy_timeout)
+elif missing and use_processes:
+    from engine import parallel
+
+    computed = parallel.run(df, {name: vertical_funcs[name] for name in missing}, workers)
+elif missing and not profile_strategies:
+    from engine import planner
+
+    # The spec strategies share one scan of the dataset
+    computed = planner.run(df, {name: vertical_funcs[name] for name in missing})
+for func_name, result in computed.items():
+    result_cache.put(cache_keys[func_name], result)
+
+
+
+def show(result, key=None, approximate=False):
+    fig, explanation, reco = result
+    if approximate:
+        st.badge('Approximate', icon=':material/hourglass_top:', color='orange')
+    st.plotly_chart(fig, key=key)
+    st.info(explanation)
+    st.success(reco)
+
+
+status = st.empty()
+if preview:
+    st.caption("Approximate: estimated from %d%% of the users. Error bars and ± show 95%% confidence intervals." % round(sample_rate * 100))
+profiles = []
+slots = {}
+if profile_strategies:
+    from engine import profiling
 for func_name, func in vertical_funcs.items():
     st.subheader(func_name)
     st.info("Goal: "+  strategy_points[func_name])
-    fig, explanation, reco = func(df)
-    st.plotly_chart(fig)
-    st.info(explanation)
-    st.success(reco)
+    result = None if profile_strategies else result_cache.get(cache_keys[func_name])
+    if result is None and func_name in approximate:
+        # Swapped for the exact result once the refinement has it
+        slots[func_name] = st.empty()
+        with slots[func_name].container():
+            show(approximate[func_name], key='approximate-' + func_name, approximate=True)
+        continue
+    if result is None and threaded is not None:
+        slots[func_name] = st.empty()
+        slots[func_name].caption('Computing…')
+        continue
+    if result is None and profile_strategies:
+        result, profile = profiling.profile(func_name, func, df)
+        profiles.append(profile)
+        result_cache.put(cache_keys[func_name], result)
+    elif result is None:
+        result = func(df)
+        result_cache.put(cache_keys[func_name], result)
+    show(result)
+
+if profiles:
+    with st.sidebar.expander('Strategy profile', expanded=True):
+        st.dataframe([profile.summary() for profile in profiles], hide_index=True)
+        st.download_button('Flamegraph (folded stacks)', profiling.folded_stacks(profiles), file_name=vertical + '.folded')
+        st.download_button('cProfile stats', profiling.dump_stats(profiles), file_name=vertical + '.prof')
+        st.download_button(
+            'Allocation report',
+            json.dumps(profiling.allocation_report(profiles), indent=2),
+            file_name=vertical + '_allocations.json',
+        )
+
+if threaded is not None:
+    for func_name, result, error in threaded:
+        if error is not None:
+            slots[func_name].error('%s failed: %s' % (func_name, error))
+            continue
+        result_cache.put(cache_keys[func_name], result)
+        with slots[func_name].container():
+            show(result)
+
+# Wait for the refinement here, so that a rerun (another vertical, date range, ...) interrupts the wait
+pending = list(slots) if refinement is not None else []
+while pending:
+    finished = refinement.done.is_set()
+    for func_name in [name for name in pending if name in refinement.results]:
+        with slots[func_name].container():
+            show(refinement.results[func_name], key='exact-' + func_name)
+        pending.remove(func_name)
+    if finished:
+        break
+    status.caption('Computing the exact charts on the full dataset: %d of %d left' % (len(pending), len(slots)))
+    refinement.done.wait(0.2)
+if refinement is not None and refinement.error is not None:
+    status.error('The exact charts could not be computed: %s' % refinement.error)
+else:
+    status.empty()
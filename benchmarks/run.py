@@ -0,0 +1,138 @@
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from engine.generator import frame as build_fixture
+from engine import dtypes, registry, schema
+from engine.datasets import select
+from engine.events import index_events
+
+# Times every strategy function of every vertical on synthetic datasets of
+# increasing size and records wall time, peak traced memory and the number of
+# memory blocks still allocated once the call returns (the result included).
+#
+#     python -m benchmarks.run --scales 100000,1000000 --out bench.json
+#     python -m benchmarks.run --compare bench.json --out new.json
+
+DEFAULT_SCALES = '100000,1000000,10000000'
+
+
+def measure(func, data, repeat):
+    # Untimed first call: imports, plotly validators and pandas caches warm up here
+    func(data)
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func(data)
+        timings.append(time.perf_counter() - start)
+
+    # Memory is traced in a separate call, tracing slows the code down
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = func(data)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename'))
+    del result
+
+    return {
+        'wall_s': statistics.median(timings),
+        'wall_min_s': min(timings),
+        'peak_bytes': peak,
+        'allocated_blocks': blocks,
+    }
+
+
+def run(verticals, scales, repeat, only=None):
+    records = []
+    for rows in scales:
+        for vertical in verticals:
+            # Loaded the way Vertical.load loads a dataset: its columns and
+            # event types only, then the dtype plan and the event index
+            spec = registry.VERTICALS[vertical]
+            data = spec.validate(select(build_fixture(vertical, rows), spec.columns(), spec.event_types()))
+            start = time.perf_counter()
+            data, _ = dtypes.optimize(data, spec.dtype_plan())
+            records.append({'vertical': vertical, 'function': 'optimize', 'rows': rows,
+                            'wall_s': time.perf_counter() - start})
+            start = time.perf_counter()
+            data = index_events(data)
+            records.append({'vertical': vertical, 'function': 'index_events', 'rows': rows,
+                            'wall_s': time.perf_counter() - start})
+            for name, func in spec.funcs().items():
+                if only and func.__name__ not in only:
+                    continue
+                record = {'vertical': vertical, 'function': func.__name__, 'strategy': name, 'rows': rows}
+                record.update(measure(func, data, repeat))
+                records.append(record)
+                print('%-12s %-36s %10d rows %9.4fs %12d B peak' % (
+                    vertical, func.__name__, rows, record['wall_s'], record['peak_bytes']))
+            del data
+    return records
+
+
+def compare(records, baseline, threshold):
+    base = {(r['vertical'], r['function'], r['rows']): r for r in baseline['results']}
+    regressions = []
+    for record in records:
+        previous = base.get((record['vertical'], record['function'], record['rows']))
+        if previous is None:
+            continue
+        for metric in ('wall_s', 'peak_bytes'):
+            if metric not in record or not previous.get(metric):
+                continue
+            ratio = record[metric] / previous[metric]
+            if ratio > 1 + threshold:
+                regressions.append((record['vertical'], record['function'], record['rows'], metric, ratio))
+    for vertical, function, rows, metric, ratio in regressions:
+        print('REGRESSION %-12s %-36s %10d rows %-10s x%.2f' % (vertical, function, rows, metric, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every strategy function across data scales.")
+    parser.add_argument('--verticals', default=','.join(schema.VERTICAL_EVENTS), help="comma-separated verticals")
+    parser.add_argument('--scales', default=DEFAULT_SCALES, help="comma-separated row counts")
+    parser.add_argument('--functions', help="comma-separated function names to run (default: all)")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per function")
+    parser.add_argument('--out', default='bench_results.json', help="where to write the results")
+    parser.add_argument('--compare', help="baseline results to check for regressions")
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed slowdown before flagging, e.g. 0.2 = 20%%")
+    args = parser.parse_args()
+
+    only = set(args.functions.split(',')) if args.functions else None
+    scales = [int(s) for s in args.scales.split(',')]
+    records = run(args.verticals.split(','), scales, args.repeat, only)
+    output = {
+        'meta': {
+            'timestamp': time.time(),
+            'python': sys.version.split()[0],
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+        },
+        'results': records,
+    }
+    with open(args.out, 'w') as f:
+        json.dump(output, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(records, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
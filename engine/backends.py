@@ -0,0 +1,361 @@
+import copy
+import logging
+import os
+import threading
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from engine import columnar
+from engine import datasets as dataset_io
+from engine import sqlite
+from engine.events import DAY, TIMESTAMP, events
+
+# Compute backends for the aggregations of the strategies.
+#
+# Strategies express their group-bys as `aggregate(data, by, aggs, event_type)`
+# and their raw column reads as `values(data, column, event_type)`. `data` is
+# either a (pandas) DataFrame, a `DuckDBEvents` handle that scans the
+# dataset's Parquet or CSV files with DuckDB, multi-threaded and spilling to
+# disk, without loading them into pandas, or a `SQLiteEvents` handle on an
+# indexed SQLite store (engine.sqlite) that aggregates in the database.
+#
+# Both backends return the same frame for the same data: one row per group
+# with a non-missing key, sorted by key, keys as plain (non-categorical)
+# values, counts as int64 and every other aggregate as float64, with sums of
+# groups that only hold missing values equal to 0.
+#
+# The backend is picked with FORGE_BACKEND (pandas by default, and with a
+# warning in place of an unknown value) or in the dashboard's sidebar. SQLite
+# stores are always aggregated in the database.
+
+BACKEND_ENV = 'FORGE_BACKEND'
+BACKENDS = ['pandas', 'duckdb']
+
+log = logging.getLogger(__name__)
+
+_COUNTS = ('size', 'count')
+_SQL = {
+    'count': 'COUNT({0})',
+    'sum': 'COALESCE(SUM(CAST({0} AS DOUBLE)), 0)',
+    'mean': 'AVG(CAST({0} AS DOUBLE))',
+    'min': 'CAST(MIN({0}) AS DOUBLE)',
+    'max': 'CAST(MAX({0}) AS DOUBLE)',
+}
+
+
+def default_backend():
+    backend = os.environ.get(BACKEND_ENV, 'pandas')
+    if backend not in BACKENDS:
+        log.warning("Unknown %s=%r (expected one of %s); using pandas", BACKEND_ENV, backend, ', '.join(BACKENDS))
+        return 'pandas'
+    return backend
+
+
+def _keys(by):
+    return [by] if isinstance(by, str) else list(by)
+
+
+def _literal(value):
+    return "'%s'" % value.replace("'", "''")
+
+
+def _quote(name):
+    return '"%s"' % name.replace('"', '""')
+
+
+def _plain_values(level):
+    values = np.asarray(level.to_numpy())
+    return values.astype('int64') if values.dtype.kind in 'iu' else values
+
+
+def _plain(index):
+    if isinstance(index, pd.MultiIndex):
+        return pd.MultiIndex.from_arrays(
+            [_plain_values(index.get_level_values(i)) for i in range(index.nlevels)], names=index.names
+        )
+    return pd.Index(_plain_values(index), name=index.name)
+
+
+def _agg_key(column, func):
+    # size counts rows whatever the column
+    return (None, 'size') if func == 'size' else (column, func)
+
+
+def _groups(queries):
+    # Each distinct (event type, keys) with the distinct aggregates asked of it
+    groups = {}
+    for by, aggs, event_type in queries:
+        funcs = groups.setdefault((event_type, tuple(_keys(by))), [])
+        for column, func in aggs.values():
+            if _agg_key(column, func) not in funcs:
+                funcs.append(_agg_key(column, func))
+    return groups
+
+
+def _select(groups, computed, queries):
+    # The frame of each query from the aggregates computed per group
+    return [
+        _normalize(pd.DataFrame({
+            name: computed[(event_type, tuple(_keys(by))) + _agg_key(column, func)]
+            for name, (column, func) in aggs.items()
+        }), aggs)
+        for by, aggs, event_type in queries
+    ]
+
+
+def _normalize(result, aggs):
+    columns = {
+        name: result[name].to_numpy(dtype='int64') if func in _COUNTS
+        else result[name].to_numpy(dtype='float64', na_value=np.nan)
+        for name, (_, func) in aggs.items()
+    }
+    return pd.DataFrame(columns, index=_plain(result.index))
+
+
+class DuckDBEvents:
+    def __init__(self, path, columns=None, event_types=None, connection=None):
+        import duckdb
+
+        self.path = path
+        self.connection = connection if connection is not None else duckdb.connect()
+        self._cursors = threading.local()
+        source = self._scan(path)
+        if TIMESTAMP in self._names(source):
+            # The calendar columns of engine.events.index_events
+            days = 'floor(%s / %d)' % (TIMESTAMP, DAY)
+            source = '(SELECT *, %s AS hour, %s AS weekday, %s AS day FROM %s)' % (
+                'CAST(floor(%s / 3600) %% 24 AS INTEGER)' % TIMESTAMP,
+                'CAST((%s + 3) %% 7 AS INTEGER)' % days,
+                'CAST(%s AS INTEGER)' % days,
+                source,
+            )
+        if event_types is not None:
+            source = '(SELECT * FROM %s WHERE event_type IN (%s))' % (source, ', '.join(_literal(e) for e in event_types))
+        self.source = source
+        self.columns = [c for c in self._names(source) if columns is None or c in columns or c == 'event_type']
+
+    def _cursor(self):
+        # One cursor per thread: sessions share a dataset (Demo.py), and a
+        # DuckDB connection must not run two threads' queries at once
+        cursor = getattr(self._cursors, 'cursor', None)
+        if cursor is None:
+            cursor = self._cursors.cursor = self.connection.cursor()
+            cursor.execute('SET enable_progress_bar = false')
+        return cursor
+
+    def close(self):
+        self.connection.close()
+
+    def _names(self, source):
+        return [row[0] for row in self._cursor().execute('DESCRIBE SELECT * FROM %s' % source).fetchall()]
+
+    @staticmethod
+    def _scan(path):
+        if dataset_io.is_append_store(path):
+            files = dataset_io.daily_files(path)
+        else:
+            files = [path]
+        if all(f.endswith(columnar.PARQUET_SUFFIX) for f in files):
+            globs = [os.path.join(f, '**', '*.parquet') if os.path.isdir(f) else f for f in files]
+            return 'read_parquet([%s], hive_partitioning = true, union_by_name = true)' % ', '.join(_literal(g) for g in globs)
+        return 'read_csv([%s], header = true, union_by_name = true)' % ', '.join(_literal(f) for f in files)
+
+    def aggregate(self, by, aggs, event_type=None):
+        return self.aggregate_many([(by, aggs, event_type)])[0]
+
+    def aggregate_many(self, queries):
+        # One scan: every distinct key set (plus event_type for filtered
+        # queries) is a grouping set, every distinct aggregate a column
+        sets, funcs = [], []
+        for by, aggs, event_type in queries:
+            keys = tuple(_keys(by)) + (('event_type',) if event_type is not None else ())
+            if keys not in sets:
+                sets.append(keys)
+            for column, func in aggs.values():
+                if _agg_key(column, func) not in funcs:
+                    funcs.append(_agg_key(column, func))
+        columns = list(dict.fromkeys(c for keys in sets for c in keys))
+        select = [_quote(c) for c in columns]
+        select.append('GROUPING(%s) AS _set' % ', '.join(_quote(c) for c in columns))
+        for i, (column, func) in enumerate(funcs):
+            expression = 'COUNT(*)' if func == 'size' else _SQL[func].format(_quote(column))
+            select.append('%s AS _a%d' % (expression, i))
+        sql = 'SELECT %s FROM %s' % (', '.join(select), self.source)
+        params = []
+        event_types = [event_type for _, _, event_type in queries]
+        if None not in event_types:
+            # Only the event types some query asks for (partition pruning for Parquet)
+            wanted = list(dict.fromkeys(event_types))
+            sql += ' WHERE event_type IN (%s)' % ', '.join('?' for _ in wanted)
+            params += wanted
+        sql += ' GROUP BY GROUPING SETS (%s)' % ', '.join('(%s)' % ', '.join(_quote(c) for c in keys) for keys in sets)
+        result = self._cursor().execute(sql, params).df()
+
+        frames = []
+        for by, aggs, event_type in queries:
+            keys = _keys(by)
+            grouped = keys + (['event_type'] if event_type is not None else [])
+            # GROUPING() sets one bit per column left out of the set, first column highest
+            mask = sum(1 << (len(columns) - 1 - i) for i, c in enumerate(columns) if c not in grouped)
+            rows = result[result['_set'] == mask]
+            rows = rows[rows[keys].notna().all(axis=1)]
+            if event_type is not None:
+                rows = rows[rows['event_type'] == event_type]
+            rows = rows.rename(columns={'_a%d' % funcs.index(_agg_key(column, func)): name for name, (column, func) in aggs.items()})
+            frames.append(_normalize(rows.set_index(keys).sort_index(), aggs))
+        return frames
+
+    def values(self, column, event_type=None):
+        sql = 'SELECT CAST(%s AS DOUBLE) AS %s FROM %s' % (_quote(column), _quote(column), self.source)
+        params = []
+        if event_type is not None:
+            sql += ' WHERE event_type = ?'
+            params.append(event_type)
+        return self._cursor().execute(sql, params).df()[column]
+
+    def head(self, n):
+        columns = ', '.join(_quote(c) for c in self.columns)
+        return self._cursor().execute('SELECT %s FROM %s LIMIT %d' % (columns, self.source, n)).df()
+
+    def time_range(self):
+        first, last = self._cursor().execute('SELECT MIN(%s), MAX(%s) FROM %s' % (TIMESTAMP, TIMESTAMP, self.source)).fetchone()
+        return None if first is None else (float(first), float(last))
+
+    def between(self, start, end):
+        # Rows with start <= client_ts < end, filtered in every query
+        view = copy.copy(self)
+        view.source = '(SELECT * FROM %s WHERE %s >= %r AND %s < %r)' % (self.source, TIMESTAMP, float(start), TIMESTAMP, float(end))
+        return view
+
+    def user_ids(self):
+        return self._cursor().execute('SELECT DISTINCT user_id FROM %s WHERE user_id IS NOT NULL' % self.source).df()['user_id']
+
+    def user_rows(self, user_ids, columns=None):
+        # Rows of the given users (engine.sampling), selected in the database
+        name = 'forge_users_%s' % uuid.uuid4().hex[:8]
+        self._cursor().register(name, pd.DataFrame({'user_id': user_ids}))
+        try:
+            columns = ', '.join(_quote(c) for c in (columns or self.columns))
+            return self._cursor().execute('SELECT %s FROM %s WHERE user_id IN (SELECT user_id FROM %s)' % (columns, self.source, name)).df()
+        finally:
+            self._cursor().unregister(name)
+
+
+class SQLiteEvents:
+    _SQL = {
+        'count': 'COUNT({0})',
+        'sum': 'TOTAL({0})',
+        'mean': 'AVG({0})',
+        'min': 'MIN({0})',
+        'max': 'MAX({0})',
+    }
+
+    def __init__(self, path, columns=None, event_types=None):
+        self.path = path
+        self.connection = sqlite.connect(path)
+        self.event_types = list(event_types) if event_types is not None else None
+        self.time = None
+        names = [row[1] for row in self.connection.execute('PRAGMA table_info(%s)' % sqlite.TABLE)]
+        self.columns = [c for c in names if columns is None or c in columns or c == 'event_type']
+
+    def close(self):
+        self.connection.close()
+
+    def _where(self, event_type=None):
+        # The event_type and client_ts indexes narrow every query to the rows it needs
+        conditions, params = [], []
+        if event_type is not None:
+            conditions.append('event_type = ?')
+            params.append(event_type)
+        elif self.event_types is not None:
+            conditions.append('event_type IN (%s)' % ', '.join('?' for _ in self.event_types))
+            params += self.event_types
+        if self.time is not None:
+            conditions.append('%s >= ? AND %s < ?' % (TIMESTAMP, TIMESTAMP))
+            params += list(self.time)
+        return (' WHERE ' + ' AND '.join(conditions) if conditions else ''), params
+
+    def _query(self, sql, params):
+        return pd.read_sql_query(sql, self.connection, params=params)
+
+    def aggregate(self, by, aggs, event_type=None):
+        return self.aggregate_many([(by, aggs, event_type)])[0]
+
+    def aggregate_many(self, queries):
+        # SQLite has no GROUPING SETS: one indexed GROUP BY per distinct (event type, keys)
+        groups = _groups(queries)
+        computed = {}
+        for (event_type, keys), funcs in groups.items():
+            select = [_quote(k) for k in keys]
+            for i, (column, func) in enumerate(funcs):
+                expression = 'COUNT(*)' if func == 'size' else self._SQL[func].format(_quote(column))
+                select.append('%s AS _a%d' % (expression, i))
+            where, params = self._where(event_type)
+            not_null = ' AND '.join('%s IS NOT NULL' % _quote(k) for k in keys)
+            where = (where + ' AND ' + not_null) if where else ' WHERE ' + not_null
+            key_list = ', '.join(_quote(k) for k in keys)
+            sql = 'SELECT %s FROM %s%s GROUP BY %s' % (', '.join(select), sqlite.TABLE, where, key_list)
+            result = self._query(sql, params).set_index(list(keys)).sort_index()
+            for i, (column, func) in enumerate(funcs):
+                computed[event_type, keys, column, func] = result['_a%d' % i]
+        return _select(groups, computed, queries)
+
+    def values(self, column, event_type=None):
+        where, params = self._where(event_type)
+        sql = 'SELECT CAST(%s AS REAL) AS %s FROM %s%s' % (_quote(column), _quote(column), sqlite.TABLE, where)
+        return self._query(sql, params)[column].astype('float64')
+
+    def head(self, n):
+        where, params = self._where()
+        columns = ', '.join(_quote(c) for c in self.columns)
+        return self._query('SELECT %s FROM %s%s LIMIT %d' % (columns, sqlite.TABLE, where, n), params)
+
+    def time_range(self):
+        where, params = self._where()
+        sql = 'SELECT MIN(%s), MAX(%s) FROM %s%s' % (TIMESTAMP, TIMESTAMP, sqlite.TABLE, where)
+        first, last = self.connection.execute(sql, params).fetchone()
+        return None if first is None else (float(first), float(last))
+
+    def between(self, start, end):
+        view = copy.copy(self)
+        view.time = (float(start), float(end))
+        return view
+
+
+def aggregate(data, by, aggs, event_type=None):
+    # aggs: {output column: (input column, 'size' | 'count' | 'sum' | 'mean' | 'min' | 'max')}
+    return aggregate_many(data, [(by, aggs, event_type)])[0]
+
+
+def aggregate_many(data, queries):
+    # queries: [(by, aggs, event_type)]; returns one frame per query, as `aggregate` would
+    if isinstance(data, (DuckDBEvents, SQLiteEvents)):
+        return data.aggregate_many(queries)
+    # Each distinct (event type, keys) is grouped once and each distinct aggregate computed once
+    groups = _groups(queries)
+    computed = {}
+    for (event_type, keys), funcs in groups.items():
+        frame = events(data, event_type) if event_type is not None else data
+        grouped = frame.groupby(list(keys), observed=True, sort=True)
+        for column, func in funcs:
+            computed[event_type, keys, column, func] = grouped.size() if func == 'size' else grouped[column].agg(func)
+    return _select(groups, computed, queries)
+
+
+def size(data, by, event_type=None):
+    return aggregate(data, by, {'size': (None, 'size')}, event_type)['size']
+
+
+def values(data, column, event_type=None):
+    if isinstance(data, (DuckDBEvents, SQLiteEvents)):
+        return data.values(column, event_type)
+    frame = events(data, event_type) if event_type is not None else data
+    return pd.Series(frame[column].to_numpy(dtype='float64', na_value=np.nan), name=column)
+
+
+def open_dataset(path, columns=None, event_types=None):
+    if sqlite.is_store(path):
+        return SQLiteEvents(path, columns, event_types)
+    return DuckDBEvents(path, columns, event_types)
@@ -0,0 +1,128 @@
+import argparse
+import html
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from engine import backends
+from engine import datasets as dataset_io
+from engine import planner, registry
+from engine.cache import digest, fingerprint, source_hash
+
+# Headless report builder: renders every strategy of every dataset in a
+# directory to a static HTML page and a JSON bundle, one process per dataset.
+#
+# Datasets are matched to verticals by name (`casual.csv`, `casual_title.csv`,
+# `casual_title.parquet`, ...). manifest.json records the dataset fingerprint
+# and strategy code hash of each bundle so unchanged ones are skipped.
+
+
+def code_hash(vertical, goals):
+    funcs = registry.VERTICALS[vertical].funcs()
+    return digest((sorted((name, source_hash(func)) for name, func in funcs.items()), goals))
+
+
+def _page(name, sections):
+    parts = ['<!DOCTYPE html><html><head><meta charset="utf-8"><title>%s</title></head><body>' % html.escape(name)]
+    parts.append('<h1>%s</h1>' % html.escape(name))
+    for i, section in enumerate(sections):
+        parts.append('<h2>%s</h2>' % html.escape(section['name']))
+        parts.append('<p><b>Goal:</b> %s</p>' % html.escape(section['goal']))
+        parts.append(section['figure'].to_html(full_html=False, include_plotlyjs='cdn' if i == 0 else False))
+        parts.append('<p>%s</p>' % html.escape(section['explanation']))
+        parts.append('<p><b>Recommendation:</b> %s</p>' % html.escape(section['recommendation']))
+    parts.append('</body></html>')
+    return '\n'.join(parts)
+
+
+def _write(path, text):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def build(name, vertical, path, goals, out_dir, backend='pandas'):
+    columns = registry.VERTICALS[vertical].columns()
+    event_types = registry.VERTICALS[vertical].event_types()
+    data, _ = registry.VERTICALS[vertical].load(path, backend)
+    dataset_fingerprint = fingerprint(path)
+
+    sections = []
+    results = planner.cached(dataset_fingerprint, registry.VERTICALS[vertical].funcs(), data, variant=(columns, event_types))
+    for func_name, (fig, explanation, recommendation) in results.items():
+        sections.append({
+            'name': func_name,
+            'goal': goals.get(func_name, ''),
+            'figure': fig,
+            'explanation': explanation,
+            'recommendation': recommendation,
+        })
+
+    html_path = os.path.join(out_dir, name + '.html')
+    json_path = os.path.join(out_dir, name + '.json')
+    _write(html_path, _page(name, sections))
+    bundle = {
+        'name': name,
+        'vertical': vertical,
+        'strategies': [dict(s, figure=json.loads(s['figure'].to_json())) for s in sections],
+    }
+    _write(json_path, json.dumps(bundle))
+    return {'html': os.path.basename(html_path), 'json': os.path.basename(json_path), 'built_at': time.time()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build static HTML/JSON strategy reports for a directory of datasets.")
+    parser.add_argument('data_dir', help="directory of per-vertical datasets (CSV or partitioned Parquet)")
+    parser.add_argument('--out', default='reports', help="output directory")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument('--force', action='store_true', help="rebuild reports that are up to date")
+    parser.add_argument('--backend', choices=backends.BACKENDS, default=backends.default_backend(), help="compute backend of the aggregations")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    manifest_path = os.path.join(args.out, 'manifest.json')
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    pending = {}
+    for name, path in dataset_io.list_datasets(args.data_dir).items():
+        vertical = registry.match(name)
+        if vertical is None:
+            print('skip', name, '(no matching vertical)')
+            continue
+        entry = {
+            'vertical': vertical,
+            'dataset': os.path.abspath(path),
+            'fingerprint': fingerprint(path),
+            'code': code_hash(vertical, registry.VERTICALS[vertical].goals),
+        }
+        previous = manifest.get(name, {})
+        up_to_date = all(previous.get(k) == v for k, v in entry.items()) and all(
+            previous.get(k) and os.path.exists(os.path.join(args.out, previous[k])) for k in ('html', 'json')
+        )
+        if up_to_date and not args.force:
+            print('up to date', name)
+            continue
+        pending[name] = entry
+
+    with ProcessPoolExecutor(args.workers) as pool:
+        futures = {
+            pool.submit(build, name, entry['vertical'], entry['dataset'], registry.VERTICALS[entry['vertical']].goals, args.out, args.backend): name
+            for name, entry in pending.items()
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                manifest[name] = dict(pending[name], **future.result())
+                print('built', name)
+            except Exception as e:
+                print('failed', name, repr(e))
+            _write(manifest_path, json.dumps(manifest, indent=2, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
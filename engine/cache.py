@@ -0,0 +1,247 @@
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+
+# Two-tier cache for strategy results: an in-memory LRU bounded by a byte
+# budget in front of a pickle-per-entry disk tier that survives restarts.
+#
+# Disk layout: <directory>/<dataset fingerprint>/<module>.<function>.<digest>.pkl
+# so a whole dataset or a whole strategy module can be dropped at once.
+
+CACHE_DIR = os.environ.get('FORGE_CACHE_DIR', '.forge_cache')
+MEMORY_BUDGET = int(os.environ.get('FORGE_CACHE_MEMORY_BYTES', 256 << 20))
+
+_MISSING = object()
+
+
+def digest(value):
+    return hashlib.sha1(repr(value).encode()).hexdigest()[:16]
+
+
+def fingerprint(path):
+    # Path, size and mtime of the dataset; partitioned datasets cover every file
+    path = os.path.abspath(path)
+    if os.path.isdir(path):
+        # Hidden files hold bookkeeping such as an append store's saved state
+        paths = sorted(
+            os.path.join(root, f) for root, _, files in os.walk(path) for f in files if not f.startswith('.')
+        )
+    else:
+        paths = [path]
+    entries = []
+    for p in paths:
+        stat = os.stat(p)
+        entries.append((os.path.relpath(p, path), stat.st_size, stat.st_mtime_ns))
+    return digest((path, entries))
+
+
+def _names(code):
+    # Globals read by a function, its comprehensions and nested functions included
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _names(const)
+    return names
+
+
+@functools.lru_cache(maxsize=None)
+def _source(value):
+    # inspect.getsource tokenizes the file (and parses the module for a
+    # class) on every call; the code of a loaded function or class is fixed
+    return inspect.getsource(value)
+
+
+def _tracked(value, module):
+    # Code whose edits change results: the strategy's own module and the engine
+    module_name = getattr(value, '__name__' if inspect.ismodule(value) else '__module__', None) or ''
+    return module_name == module or module_name.startswith('engine.')
+
+
+def _references(func):
+    # (name, value) of the globals, closure variables and attributes of
+    # tracked modules (`backends.aggregate`) the function reads
+    names = _names(func.__code__)
+    closure = zip(func.__code__.co_freevars, [cell.cell_contents for cell in func.__closure__ or ()])
+    for name, value in sorted(closure, key=lambda item: item[0]):
+        yield name, value
+    for name in sorted(names):
+        value = func.__globals__.get(name)
+        if inspect.ismodule(value) and _tracked(value, func.__module__):
+            for attribute in sorted(names):
+                if attribute in vars(value):
+                    yield '%s.%s' % (name, attribute), vars(value)[attribute]
+        elif name in func.__globals__:
+            yield name, value
+
+
+def _sources(func, seen):
+    # The function plus what it reads: the same-module and engine helpers it
+    # calls (e.g. the aggregate and figure halves of a strategy), the classes
+    # it uses with their methods and the values of the module-level rules,
+    # constants and closure variables it reads (Segmentation thresholds, a
+    # Spec's query, ...). Decorated strategies (engine.specs,
+    # engine.sessions) are hashed with their wrapper, so the aggregation or
+    # session table the wrapper runs is part of the hash.
+    func = getattr(func, '__func__', func)
+    seen.add(func)
+    try:
+        sources = [_source(func)]
+    except (OSError, TypeError):
+        return [func.__qualname__]
+    wrapped = getattr(func, '__wrapped__', None)
+    if wrapped is not None and wrapped not in seen:
+        sources.extend(_sources(wrapped, seen))
+    for name, value in _references(func):
+        if inspect.ismodule(value) or inspect.isbuiltin(value):
+            continue
+        if inspect.isfunction(value):
+            if _tracked(value, func.__module__) and value not in seen:
+                sources.extend(_sources(value, seen))
+            continue
+        if not inspect.isclass(value):
+            text = repr(value)
+            # Default object reprs hold an address, different in every process
+            sources.append('%s = %s' % (name, text if ' at 0x' not in text else type(value).__qualname__))
+            value = type(value)
+        if _tracked(value, func.__module__) and value not in seen:
+            seen.add(value)
+            try:
+                sources.append(_source(value))
+            except (OSError, TypeError):
+                sources.append(value.__qualname__)
+                continue
+            for method in vars(value).values():
+                if inspect.isfunction(method) and method not in seen:
+                    sources.extend(_sources(method, seen))
+    return sources
+
+
+def source_hash(func):
+    return digest(_sources(func, set()))
+
+
+class ByteLRU:
+    def __init__(self, budget):
+        self.budget = budget
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def put(self, key, value, size):
+        evicted = []
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+            if size > self.budget:
+                return evicted
+            self._entries[key] = (value, size)
+            self.nbytes += size
+            while self.nbytes > self.budget:
+                old_key, (_, old_size) = self._entries.popitem(last=False)
+                self.nbytes -= old_size
+                evicted.append(old_key)
+        return evicted
+
+    def pop(self, key):
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+
+    def keys(self):
+        with self._lock:
+            return list(self._entries)
+
+    def sizes(self):
+        with self._lock:
+            return {key: size for key, (_, size) in self._entries.items()}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+
+class ResultCache:
+    def __init__(self, directory=CACHE_DIR, memory_budget=MEMORY_BUDGET):
+        self.directory = directory
+        self.memory = ByteLRU(memory_budget)
+
+    def key(self, dataset, func, variant=None):
+        # `variant` covers anything else the result depends on, e.g. the loaded columns
+        return (dataset, func.__module__, func.__qualname__, digest((source_hash(func), variant)))
+
+    def _path(self, key):
+        dataset, module, name, digest = key
+        return os.path.join(self.directory, dataset, '%s.%s.%s.pkl' % (module, name, digest))
+
+    def get(self, key, default=None):
+        value = self.memory.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        try:
+            with open(self._path(key), 'rb') as f:
+                payload = f.read()
+        except FileNotFoundError:
+            return default
+        value = pickle.loads(payload)
+        self.memory.put(key, value, len(payload))
+        return value
+
+    def put(self, key, value):
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # One temp file per writer: threads of a process may put the same key at once
+        tmp_path = '%s.%s.tmp' % (path, uuid.uuid4().hex)
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+        self.memory.put(key, value, len(payload))
+
+    def get_or_compute(self, dataset, func, data, variant=None):
+        key = self.key(dataset, func, variant)
+        result = self.get(key)
+        if result is None:
+            result = func(data)
+            self.put(key, result)
+        return result
+
+    def invalidate(self, dataset=None, module=None):
+        for key in self.memory.keys():
+            if (dataset is None or key[0] == dataset) and (module is None or key[1] == module):
+                self.memory.pop(key)
+        if not os.path.isdir(self.directory):
+            return
+        datasets = [dataset] if dataset is not None else os.listdir(self.directory)
+        for d in datasets:
+            dataset_dir = os.path.join(self.directory, d)
+            if not os.path.isdir(dataset_dir):
+                continue
+            if module is None:
+                shutil.rmtree(dataset_dir, ignore_errors=True)
+                continue
+            for f in os.listdir(dataset_dir):
+                if f.startswith(module + '.'):
+                    os.remove(os.path.join(dataset_dir, f))
+
+    def clear(self):
+        self.invalidate()
+
+
+results = ResultCache()
@@ -0,0 +1,84 @@
+import argparse
+import os
+
+# Columnar (Parquet) copies of the per-vertical CSV exports.
+#
+# Each dataset is written as a directory partitioned on `event_type`
+# (`casual.parquet/event_type=ad/part-0.parquet`), so a reader that only
+# needs a few event types never touches the row groups of the others.
+
+PARQUET_SUFFIX = '.parquet'
+PARTITION_COLUMN = 'event_type'
+
+
+def _infer_schema(csv_path, sample_rows):
+    import pyarrow as pa
+    import pyarrow.csv as pv
+
+    with open(csv_path, 'rb') as f:
+        header = f.readline()
+        sample = header + b''.join(f.readline() for _ in range(sample_rows))
+    table = pv.read_csv(pa.BufferReader(sample), convert_options=pv.ConvertOptions(strings_can_be_null=True))
+    # Columns that are empty in the sample carry no type information; keep
+    # them as text rather than failing on the first block that has values.
+    fields = [
+        pa.field(field.name, pa.string()) if pa.types.is_null(field.type) else field
+        for field in table.schema
+    ]
+    return pa.schema(fields)
+
+
+def convert(csv_path, out_path=None, block_size=64 << 20, sample_rows=100_000):
+    import pyarrow.csv as pv
+    import pyarrow.dataset as ds
+
+    if out_path is None:
+        out_path = os.path.splitext(csv_path)[0] + PARQUET_SUFFIX
+    schema = _infer_schema(csv_path, sample_rows)
+    reader = pv.open_csv(
+        csv_path,
+        read_options=pv.ReadOptions(block_size=block_size),
+        # Match pd.read_csv, which reads empty fields as missing
+        convert_options=pv.ConvertOptions(column_types=schema, strings_can_be_null=True),
+    )
+    ds.write_dataset(
+        reader,
+        out_path,
+        format='parquet',
+        partitioning=[PARTITION_COLUMN],
+        partitioning_flavor='hive',
+        existing_data_behavior='delete_matching',
+        use_threads=False,
+    )
+    return out_path
+
+
+def read(path, columns=None, event_types=None):
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(path, format='parquet', partitioning='hive')
+    if columns is not None:
+        columns = [c for c in dataset.schema.names if c in set(columns) | {PARTITION_COLUMN}]
+    row_filter = None
+    if event_types is not None:
+        row_filter = ds.field(PARTITION_COLUMN).isin(list(event_types))
+    return dataset.to_table(columns=columns, filter=row_filter).to_pandas()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert per-vertical CSV exports to partitioned Parquet.")
+    parser.add_argument('paths', nargs='+', help="CSV files or directories containing them")
+    parser.add_argument('--block-size', type=int, default=64 << 20, help="CSV read block size in bytes")
+    args = parser.parse_args()
+
+    for path in args.paths:
+        if os.path.isdir(path):
+            csv_paths = [os.path.join(path, f) for f in sorted(os.listdir(path)) if f.endswith('.csv')]
+        else:
+            csv_paths = [path]
+        for csv_path in csv_paths:
+            print(csv_path, '->', convert(csv_path, block_size=args.block_size))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+import os
+
+import pandas as pd
+
+from engine import columnar, sqlite
+
+
+def is_append_store(path):
+    # A plain directory of daily event files (CSV or Parquet), see engine.incremental
+    return os.path.isdir(path) and not path.endswith(columnar.PARQUET_SUFFIX)
+
+
+def list_datasets(directory):
+    # Map each vertical to its dataset, preferring the SQLite store, then the
+    # columnar copy, to the CSV export when several exist (`.csv` < `.parquet`
+    # < `.sqlite` in sorted order, so the preferred one comes last).
+    datasets = {}
+    for f in sorted(os.listdir(directory)):
+        name, ext = os.path.splitext(f)
+        path = os.path.join(directory, f)
+        if ext in (columnar.PARQUET_SUFFIX, sqlite.SQLITE_SUFFIX) or (ext == '.csv' and name not in datasets):
+            datasets[name] = path
+        elif not ext and not name.startswith('.') and is_append_store(path):
+            datasets[name] = path
+    return datasets
+
+
+def daily_files(directory):
+    return [
+        os.path.join(directory, f) for f in sorted(os.listdir(directory))
+        if f.endswith('.csv') or f.endswith(columnar.PARQUET_SUFFIX)
+    ]
+
+
+def load(path, columns=None, event_types=None):
+    if is_append_store(path):
+        frames = [load(f, columns, event_types) for f in daily_files(path)]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+    if path.endswith(columnar.PARQUET_SUFFIX):
+        return columnar.read(path, columns, event_types)
+    if sqlite.is_store(path):
+        return sqlite.read(path, columns, event_types)
+
+    usecols = None
+    if columns is not None:
+        wanted = set(columns) | {'event_type'}
+        usecols = lambda c: c in wanted
+    return select(pd.read_csv(path, usecols=usecols), event_types=event_types)
+
+
+def select(df, columns=None, event_types=None):
+    # The given columns (and event_type) of the rows of the given event types
+    if columns is not None:
+        wanted = set(columns) | {'event_type'}
+        df = df[[c for c in df.columns if c in wanted]]
+    if event_types is not None:
+        df = df[df['event_type'].isin(event_types)].reset_index(drop=True)
+    return df
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from engine import schema
+
+# Memory plan applied to a vertical's dataset once it is loaded.
+#
+# Low-cardinality text columns (event_type and the categorical columns of the
+# export schema) become pandas categoricals: one small integer code per row
+# and each distinct string stored once. Numeric columns of the schema that
+# only hold whole numbers are downcast to the smallest integer type that holds
+# them (a nullable one when the column has gaps). Other floats are left as
+# they are: in float32, group sums and means would lose precision.
+
+CATEGORICAL = ['event_type'] + list(schema.CATEGORIES)
+NUMERIC = list(schema.NUMERICS)
+
+
+def plan(columns):
+    return {
+        column: 'category' if column in CATEGORICAL else 'numeric'
+        for column in columns if column in CATEGORICAL or column in NUMERIC
+    }
+
+
+def downcast(values):
+    if values.dtype.kind in 'iu':
+        return pd.to_numeric(values, downcast='integer')
+    if values.dtype.kind != 'f':
+        return values
+    array = values.to_numpy()
+    present = array[~np.isnan(array)]
+    if not np.array_equal(present, np.trunc(present)):
+        return values
+    if len(present) == len(array):
+        return pd.to_numeric(values, downcast='integer')
+    # Whole numbers with gaps: nullable integers keep the gaps as <NA>
+    integers = pd.to_numeric(pd.Series(present), downcast='integer')
+    return values.astype(pd.api.types.pandas_dtype(integers.dtype.name.capitalize()))
+
+
+def footprint(data):
+    return int(data.memory_usage(index=True, deep=True).sum())
+
+
+def optimize(data, column_plan=None):
+    if column_plan is None:
+        column_plan = plan(data.columns)
+    before = footprint(data)
+    converted = {
+        column: data[column].astype('category') if kind == 'category' else downcast(data[column])
+        for column, kind in column_plan.items() if column in data.columns
+    }
+    data = data.assign(**converted)
+    return data, (before, footprint(data))
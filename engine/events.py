@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+from engine import dtypes
+
+# Time-ordered event frame shared by all strategies of a vertical.
+#
+# `index_events` sorts the rows once by `client_ts` (stable, missing
+# timestamps last) and adds integer calendar columns, so a date range is two
+# binary searches and a positional slice: `data.between(start, end)` is a
+# zero-copy view that every strategy can be handed. Rows of one event type are
+# found through a precomputed position index (the stable argsort of the
+# `event_type` codes, one contiguous run per event type), so
+# `events(data, 'ad')` gathers exactly those rows instead of scanning the
+# whole frame with a boolean mask.
+
+TIMESTAMP = 'client_ts'
+# Calendar columns derived from client_ts (UTC): hour of the day, day of the
+# week (Monday = 0) and day number since the epoch
+CALENDAR = ['hour', 'weekday', 'day']
+DAY = 86400
+
+
+class EventFrame(pd.DataFrame):
+    _metadata = ['_event_order', '_event_slices']
+
+    @property
+    def _constructor(self):
+        # Anything derived from an EventFrame is an ordinary DataFrame: its rows
+        # no longer line up with the position index.
+        return pd.DataFrame
+
+    def events(self, event_type):
+        start, stop = self._event_slices.get(event_type, (0, 0))
+        return self.take(self._event_order[start:stop])
+
+    def event_types(self):
+        return list(self._event_slices)
+
+    def timestamps(self):
+        return self[TIMESTAMP].to_numpy(dtype='float64', na_value=np.nan)
+
+    def time_range(self):
+        # First and last timestamp, or None without any
+        timestamps = self.timestamps()
+        timestamps = timestamps[~np.isnan(timestamps)]
+        return (timestamps[0], timestamps[-1]) if len(timestamps) else None
+
+    def between(self, start, end):
+        # Rows with start <= client_ts < end, as a view of this frame
+        timestamps = self.timestamps()
+        first, last = np.searchsorted(timestamps, [start, end], side='left')
+        view = EventFrame(self.iloc[first:last])
+        order, slices = [], {}
+        offset = 0
+        for event_type, (block_start, block_stop) in self._event_slices.items():
+            positions = self._event_order[block_start:block_stop]
+            lo, hi = np.searchsorted(positions, [first, last], side='left')
+            order.append(positions[lo:hi] - first)
+            slices[event_type] = (offset, offset + hi - lo)
+            offset += hi - lo
+        view._event_order = np.concatenate(order) if order else np.empty(0, dtype=self._event_order.dtype)
+        view._event_slices = slices
+        return view
+
+    def subset(self, mask):
+        # Rows where mask is true, still time-ordered and indexed by event type
+        positions = np.flatnonzero(mask)
+        frame = EventFrame(self.take(positions).reset_index(drop=True))
+        # New position of every kept row
+        renumbered = np.cumsum(mask) - 1
+        order, slices = [], {}
+        offset = 0
+        for event_type, (block_start, block_stop) in self._event_slices.items():
+            block = self._event_order[block_start:block_stop]
+            kept = renumbered[block[mask[block]]]
+            order.append(kept)
+            slices[event_type] = (offset, offset + len(kept))
+            offset += len(kept)
+        frame._event_order = np.concatenate(order).astype(self._event_order.dtype) if order else np.empty(0, dtype=self._event_order.dtype)
+        frame._event_slices = slices
+        return frame
+
+
+def calendar(timestamps):
+    seconds = pd.Series(timestamps)
+    days = seconds // DAY
+    return {
+        'hour': dtypes.downcast(seconds // 3600 % 24),
+        # 1970-01-01 was a Thursday
+        'weekday': dtypes.downcast((days + 3) % 7),
+        'day': dtypes.downcast(days),
+    }
+
+
+def index_events(data):
+    if isinstance(data, EventFrame):
+        return data
+    if TIMESTAMP in data.columns:
+        timestamps = data[TIMESTAMP].to_numpy(dtype='float64', na_value=np.nan)
+        # NaN sorts last
+        order = np.argsort(timestamps, kind='stable')
+        data = data.take(order).reset_index(drop=True)
+        data = data.assign(**calendar(timestamps[order]))
+    codes, uniques = pd.factorize(data['event_type'], sort=True)
+    event_order = np.argsort(codes, kind='stable').astype(np.min_scalar_type(max(len(data) - 1, 0)))
+    bounds = np.searchsorted(codes[event_order], np.arange(len(uniques) + 1), side='left')
+
+    frame = EventFrame(data)
+    frame._event_order = event_order
+    frame._event_slices = {
+        event_type: (int(bounds[i]), int(bounds[i + 1])) for i, event_type in enumerate(uniques)
+    }
+    return frame
+
+
+def events(data, event_type):
+    if isinstance(data, EventFrame):
+        return data.events(event_type)
+    return data[data['event_type'] == event_type]
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+# Trace builders that keep figure payloads small whatever the dataset size.
+#
+# Histograms are binned here with NumPy and sent as one bar per bin instead of
+# the raw per-user or per-session values, and categorical count axes are
+# capped to their largest categories.
+
+MAX_CATEGORIES = 30
+OTHER = 'other'
+
+
+def histogram(values, nbins=20, **trace):
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    bins = nbins
+    if len(values) and np.array_equal(values, np.trunc(values)):
+        # Whole numbers (kills, group sizes, ...): bins of a whole number of
+        # values each, edges halfway between values, so no bin is left empty or
+        # gets an extra value by where the edges fall
+        low, span = values.min(), values.max() - values.min() + 1
+        width = np.ceil(span / nbins)
+        bins = low - 0.5 + width * np.arange(int(np.ceil(span / width)) + 1)
+    counts, edges = np.histogram(values, bins=bins)
+    return go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=counts,
+        width=np.diff(edges),
+        customdata=np.column_stack([edges[:-1], edges[1:]]),
+        hovertemplate='%{customdata[0]:.3~f} - %{customdata[1]:.3~f}<br>%{y}<extra></extra>',
+        **trace
+    )
+
+
+def top_n(counts, value='count', n=MAX_CATEGORIES, other=OTHER):
+    # Keep the n largest categories in their original order, sum the rest into `other`
+    if len(counts) <= n:
+        return counts
+    label = next(c for c in counts.columns if c != value)
+    order = np.argsort(-counts[value].to_numpy(), kind='stable')
+    rest = counts[value].to_numpy()[order[n:]].sum()
+    kept = counts.iloc[np.sort(order[:n])]
+    return pd.concat([kept, pd.DataFrame({label: [other], value: [rest]})], ignore_index=True)
+
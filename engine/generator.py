@@ -0,0 +1,182 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from engine import columnar, schema
+
+# Synthetic event exports for any vertical, generated in chunks so datasets far
+# larger than memory can be written to CSV or partitioned Parquet.
+#
+# Every chunk holds whole sessions: a session opens with session_start, closes
+# with session_end and its client_ts increase monotonically in between.
+# Sessions are spread over DAYS days in start order, each played by a user of
+# a population shared by all chunks (user-level columns such as age_group stay
+# the same across a user's sessions).
+#
+#     python -m engine.generator --rows 100000 --out dummy_data
+#     python -m engine.generator shooter --rows 100000000 --format parquet
+
+BASE_TS = 1_700_000_000
+DAYS = 30
+EVENTS_PER_SESSION = 20
+SESSIONS_PER_USER = 5
+
+
+def _labels(prefix, codes):
+    return np.char.add(prefix, codes.astype(str)).astype(object)
+
+
+def _carried_by(event_code, event_types, carriers):
+    carried = np.array([e in carriers for e in event_types])
+    return carried[event_code]
+
+
+def _categorical(values, codes, carried):
+    codes = np.where(carried, codes, len(values))
+    return np.array(values + [None], dtype=object)[codes]
+
+
+def _chunk(rng, vertical, rows, first_session, start, end, n_users, traits):
+    event_types = schema.SESSION_EVENTS + schema.VERTICAL_EVENTS[vertical]
+    columns = schema.vertical_columns(vertical)
+
+    n_sessions = max(1, rows // EVENTS_PER_SESSION)
+    counts = rng.multinomial(rows, np.full(n_sessions, 1 / n_sessions))
+    counts = counts[counts > 0]
+    session = np.repeat(np.arange(len(counts)), counts)
+    first = np.r_[True, session[1:] != session[:-1]]
+    last = np.r_[session[1:] != session[:-1], True]
+
+    event_code = rng.integers(len(schema.SESSION_EVENTS), len(event_types), rows)
+    event_code[first] = event_types.index('session_start')
+    event_code[last & ~first] = event_types.index('session_end')
+
+    # Sessions start in order over the chunk's time window; events follow every ~30s
+    gaps = rng.exponential(30, rows).astype(np.int64)
+    gaps[first] = 0
+    elapsed = np.cumsum(gaps)
+    elapsed -= np.maximum.accumulate(np.where(first, elapsed, 0))
+    session_start = np.sort(rng.integers(start, max(end, start + 1), len(counts)))
+    client_ts = session_start[session] + elapsed
+
+    session_user = rng.integers(0, n_users, len(counts))
+    data = {
+        'user_id': _labels('user_', session_user)[session],
+        'session_id': _labels('session_', first_session + np.arange(len(counts)))[session],
+        'event_type': np.array(event_types, dtype=object)[event_code],
+        'client_ts': client_ts,
+    }
+    for column, (carriers, values) in schema.CATEGORIES.items():
+        if column not in columns:
+            continue
+        if carriers is None:
+            data[column] = np.array(values, dtype=object)[traits[column][session_user]][session]
+        else:
+            codes = rng.integers(0, len(values), rows)
+            data[column] = _categorical(values, codes, _carried_by(event_code, event_types, carriers))
+
+    numerics = {
+        'score': lambda: rng.normal(1000, 250, rows).round(1),
+        'amount': lambda: rng.integers(1, 500, rows).astype(float),
+        'kills': lambda: rng.poisson(3, rows).astype(float),
+        'deaths': lambda: rng.poisson(2, rows).astype(float),
+        'session_length': lambda: elapsed.astype(float),
+    }
+    for column, carriers in schema.NUMERICS.items():
+        if column in columns:
+            data[column] = np.where(_carried_by(event_code, event_types, carriers), numerics[column](), np.nan)
+
+    return pd.DataFrame(data), len(counts)
+
+
+def chunks(vertical, rows, chunk_rows=1_000_000, seed=0):
+    rng = np.random.default_rng(seed)
+    n_users = max(1, rows // (EVENTS_PER_SESSION * SESSIONS_PER_USER))
+    # Per-user attributes, drawn once so they stay consistent across chunks
+    traits = {}
+    for column, (carriers, values) in schema.CATEGORIES.items():
+        if carriers is None:
+            traits[column] = rng.integers(0, len(values), n_users).astype(np.int8)
+
+    span = DAYS * 86400
+    emitted = 0
+    first_session = 0
+    while emitted < rows:
+        n = min(chunk_rows, rows - emitted)
+        start = BASE_TS + span * emitted // rows
+        end = BASE_TS + span * (emitted + n) // rows
+        chunk, n_sessions = _chunk(rng, vertical, n, first_session, start, end, n_users, traits)
+        yield chunk
+        emitted += n
+        first_session += n_sessions
+
+
+def frame(vertical, rows, seed=0):
+    return pd.concat(chunks(vertical, rows, seed=seed), ignore_index=True)
+
+
+def arrow_schema(vertical):
+    import pyarrow as pa
+
+    fields = []
+    for column in schema.vertical_columns(vertical):
+        if column == 'client_ts':
+            fields.append(pa.field(column, pa.int64()))
+        elif column in schema.NUMERICS:
+            fields.append(pa.field(column, pa.float64()))
+        else:
+            fields.append(pa.field(column, pa.string()))
+    return pa.schema(fields)
+
+
+def write_csv(path, vertical, rows, chunk_rows=1_000_000, seed=0):
+    with open(path, 'w', newline='') as f:
+        for i, chunk in enumerate(chunks(vertical, rows, chunk_rows, seed)):
+            chunk.to_csv(f, header=i == 0, index=False)
+    return path
+
+
+def write_parquet(path, vertical, rows, chunk_rows=1_000_000, seed=0):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    table_schema = arrow_schema(vertical)
+    batches = (
+        pa.RecordBatch.from_pandas(chunk, schema=table_schema, preserve_index=False)
+        for chunk in chunks(vertical, rows, chunk_rows, seed)
+    )
+    ds.write_dataset(
+        batches,
+        path,
+        schema=table_schema,
+        format='parquet',
+        partitioning=[columnar.PARTITION_COLUMN],
+        partitioning_flavor='hive',
+        existing_data_behavior='delete_matching',
+        use_threads=False,
+    )
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic event datasets for one or more verticals.")
+    parser.add_argument('verticals', nargs='*', help="verticals to generate (default: all)")
+    parser.add_argument('--rows', type=int, default=100_000, help="rows per dataset")
+    parser.add_argument('--out', default='dummy_data', help="output directory")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--chunk-rows', type=int, default=1_000_000, help="rows generated and written at a time")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    write = write_parquet if args.format == 'parquet' else write_csv
+    suffix = columnar.PARQUET_SUFFIX if args.format == 'parquet' else '.csv'
+    for vertical in args.verticals or list(schema.VERTICAL_EVENTS):
+        path = os.path.join(args.out, vertical + suffix)
+        print(vertical, '->', write(path, vertical, args.rows, args.chunk_rows, args.seed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import os
+import pickle
+import uuid
+
+from engine import datasets as dataset_io
+from engine import registry
+from engine import streaming
+from engine.cache import digest, fingerprint, source_hash
+
+# Append-aware refresh for a directory of daily event files.
+#
+# The store remembers which files it has ingested (by fingerprint) and keeps
+# the merged partial state of every streamable strategy of the vertical (see
+# engine.streaming). A refresh only streams the files that are new since the
+# last one and folds them into the saved states. A strategy whose code changed,
+# or a previously ingested file that was rewritten or removed, triggers a
+# rebuild of the affected states from every file.
+
+STATE_FILE = '.forge_state.pkl'
+
+
+def partial_hash(partial):
+    return digest([source_hash(f) for f in (partial.aggregate, partial.merge, partial.finish)])
+
+
+class AppendStore:
+    def __init__(self, directory, vertical):
+        self.directory = directory
+        self.vertical = vertical
+        self.state_path = os.path.join(directory, STATE_FILE)
+        self.partials = registry.VERTICALS[vertical].partials()
+        self.columns = registry.VERTICALS[vertical].columns()
+        self.event_types = registry.VERTICALS[vertical].event_types()
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return {'files': {}, 'code': {}, 'states': {}}
+
+    def _save_state(self, state):
+        # One temp file per writer: sessions of a process may refresh at once
+        tmp_path = '%s.%s.tmp' % (self.state_path, uuid.uuid4().hex)
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.state_path)
+
+    def _fold(self, states, names, paths, chunksize):
+        chunks = (
+            chunk for path in paths
+            for chunk in streaming.iter_chunks(path, chunksize, self.columns, self.event_types)
+        )
+        streaming.fold(states, {name: self.partials[name] for name in names}, chunks)
+
+    def refresh(self, chunksize=1_000_000):
+        state = self._load_state()
+        files = {os.path.basename(p): fingerprint(p) for p in dataset_io.daily_files(self.directory)}
+        code = {name: partial_hash(partial) for name, partial in self.partials.items()}
+
+        rewritten = any(files.get(f) != fp for f, fp in state['files'].items())
+        stale = [name for name in self.partials if rewritten or state['code'].get(name) != code[name]]
+        fresh = [name for name in self.partials if name not in stale]
+        new_files = [os.path.join(self.directory, f) for f in files if f not in state['files']]
+
+        states = {name: state['states'][name] for name in fresh if name in state['states']}
+        all_files = [os.path.join(self.directory, f) for f in files]
+        if stale:
+            self._fold(states, stale, all_files, chunksize)
+        if fresh and new_files:
+            self._fold(states, fresh, new_files, chunksize)
+
+        if stale or new_files:
+            self._save_state({'files': files, 'code': code, 'states': states})
+        return {name: partial.finish(states[name]) for name, partial in self.partials.items() if name in states}
+
+    def ingested(self):
+        return sorted(self._load_state()['files'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fold new daily event files into a vertical's saved strategy aggregates.")
+    parser.add_argument('directory', help="directory of daily CSV or Parquet files")
+    parser.add_argument('--vertical', help="strategy module to use (defaults to the directory name)")
+    parser.add_argument('--chunksize', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    vertical = args.vertical or os.path.basename(os.path.normpath(args.directory))
+    store = AppendStore(args.directory, vertical)
+    results = store.refresh(args.chunksize)
+    print('%s: %d files ingested, %d strategies up to date' % (vertical, len(store.ingested()), len(results)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+import json
+import logging
+import os
+import pickle
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from engine import dtypes
+from engine.cache import digest, fingerprint, results as result_cache, source_hash
+from engine.events import EventFrame, index_events
+
+# Memory-mapped columnar cache of loaded datasets.
+#
+# The first load of a vertical's dataset (requirements, dtype plan and event
+# index applied) is written next to the dataset's cached results as plain
+# binary columns:
+#
+#     <cache>/<dataset fingerprint>/frames/<digest>/
+#         frame.json          columns, row count, event index slices, footprint
+#         <i>.npy             numeric column i (nullable ones with <i>.mask.npy)
+#         <i>.npy, <i>.pkl    categorical column i: its codes and its dictionary
+#         <i>.offsets.npy,    string column i in Arrow's layout: offsets, UTF-8
+#         <i>.data.npy,       bytes and validity bitmap
+#         <i>.valid.npy
+#         event_order.npy     the event type position index
+#
+# Every later load maps the files read-only and wraps them as a DataFrame
+# without copying, so all sessions and dashboard processes of a host share the
+# same page cache pages instead of holding a copy each. Set FORGE_MAPPED=0 to
+# load into process memory instead.
+#
+# The digest covers the file format version and the source of the load
+# pipeline (dtype plan, event index), so a change to either writes a new copy.
+# Writing the copy of a changed dataset deletes the copies of its older
+# versions.
+
+MAPPED_ENV = 'FORGE_MAPPED'
+MANIFEST = 'frame.json'
+# Bumped on any change to the layout of the files
+FORMAT_VERSION = 1
+
+log = logging.getLogger(__name__)
+
+
+def enabled():
+    return os.environ.get(MAPPED_ENV, '1') != '0'
+
+
+def directory(path, key):
+    pipeline = (FORMAT_VERSION, source_hash(dtypes.optimize), source_hash(index_events))
+    return os.path.join(result_cache.directory, fingerprint(path), 'frames', digest((pipeline, key)))
+
+
+def _drop_stale(path, current):
+    # Copies of older versions of the dataset, found by the path in their manifest
+    source = os.path.abspath(path)
+    for dataset in os.listdir(result_cache.directory):
+        frames = os.path.join(result_cache.directory, dataset, 'frames')
+        if dataset == current or not os.path.isdir(frames):
+            continue
+        for name in os.listdir(frames):
+            try:
+                with open(os.path.join(frames, name, MANIFEST)) as f:
+                    stale = json.load(f).get('source') == source
+            except (OSError, ValueError):
+                continue
+            if stale:
+                shutil.rmtree(os.path.join(frames, name), ignore_errors=True)
+
+
+def _save(out, name, values):
+    np.save(os.path.join(out, name), values)
+
+
+def _save_dtype(out, i, dtype):
+    # The dictionary file: the column's dtype, with its categories
+    with open(os.path.join(out, '%d.pkl' % i), 'wb') as f:
+        pickle.dump(dtype, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _write_column(out, i, column):
+    # (kind, details) of the files written for the column; kind is None for
+    # columns that cannot be mapped
+    dtype = column.dtype
+    array = column.array
+    if isinstance(dtype, np.dtype) and dtype.kind in 'biufcmM':
+        _save(out, '%d.npy' % i, np.ascontiguousarray(column.to_numpy()))
+        return 'array', None
+    if isinstance(dtype, pd.CategoricalDtype):
+        _save(out, '%d.npy' % i, array.codes)
+        _save_dtype(out, i, dtype)
+        return 'codes', None
+    if isinstance(array, pd.arrays.IntegerArray):
+        # Values (0 where missing) and the mask of the missing ones
+        _save(out, '%d.npy' % i, column.to_numpy(dtype=dtype.numpy_dtype, na_value=0))
+        _save(out, '%d.mask.npy' % i, column.isna().to_numpy())
+        _save_dtype(out, i, dtype)
+        return 'masked', None
+    if isinstance(array, pd.arrays.ArrowStringArray):
+        import pyarrow as pa
+
+        chunks = pa.array(column)
+        if isinstance(chunks, pa.ChunkedArray):
+            chunks = chunks.combine_chunks()
+        validity, offsets, data = chunks.buffers()
+        width = np.int64 if pa.types.is_large_string(chunks.type) else np.int32
+        _save(out, '%d.offsets.npy' % i, np.frombuffer(offsets, dtype=width))
+        _save(out, '%d.data.npy' % i, np.frombuffer(data, dtype=np.uint8) if data is not None else np.empty(0, dtype=np.uint8))
+        if validity is not None:
+            _save(out, '%d.valid.npy' % i, np.frombuffer(validity, dtype=np.uint8))
+        _save_dtype(out, i, dtype)
+        return 'string', [str(chunks.type), chunks.offset, chunks.null_count, validity is not None]
+    return None, None
+
+
+def _read_column(out, i, kind, details, length):
+    def mapped(name):
+        return np.load(os.path.join(out, name), mmap_mode='r')
+
+    if kind == 'array':
+        return mapped('%d.npy' % i)
+    with open(os.path.join(out, '%d.pkl' % i), 'rb') as f:
+        dtype = pickle.load(f)
+    if kind == 'codes':
+        return pd.Categorical.from_codes(mapped('%d.npy' % i), dtype=dtype, validate=False)
+    if kind == 'masked':
+        return pd.arrays.IntegerArray(mapped('%d.npy' % i), mapped('%d.mask.npy' % i))
+    import pyarrow as pa
+
+    arrow_type, offset, null_count, has_validity = details
+    buffers = [
+        pa.py_buffer(mapped('%d.valid.npy' % i)) if has_validity else None,
+        pa.py_buffer(mapped('%d.offsets.npy' % i)),
+        pa.py_buffer(mapped('%d.data.npy' % i)),
+    ]
+    array = pa.Array.from_buffers(pa.type_for_alias(arrow_type), length, buffers, null_count=null_count, offset=offset)
+    return pd.arrays.ArrowStringArray(pa.chunked_array([array]), dtype=dtype)
+
+
+def read(path, key):
+    # The mapped frame and its footprint, or None when it is not cached
+    out = directory(path, key)
+    try:
+        with open(os.path.join(out, MANIFEST)) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    length = manifest['length']
+    columns = {
+        name: _read_column(out, i, kind, details, length)
+        for i, (name, kind, details) in enumerate(manifest['columns'])
+    }
+    frame = pd.DataFrame(columns, copy=False)
+    if manifest['event_slices'] is not None:
+        frame = EventFrame(frame)
+        frame._event_order = np.load(os.path.join(out, 'event_order.npy'), mmap_mode='r')
+        frame._event_slices = {event_type: (start, stop) for event_type, start, stop in manifest['event_slices']}
+    return frame, tuple(manifest['footprint'])
+
+
+def write(path, key, data, footprint):
+    # Writes the frame and returns it mapped; frames that cannot be mapped
+    # (another index, columns of other kinds) are returned as they are
+    if not data.index.equals(pd.RangeIndex(len(data))):
+        log.warning("Not mapping %s: its frame has an index of its own; loading it into memory", path)
+        return data, footprint
+    out = directory(path, key)
+    # Written next to its final place and renamed into it whole: readers never
+    # see a partial frame, and of two processes writing it at once one wins
+    tmp = '%s.%s.tmp' % (out, uuid.uuid4().hex[:8])
+    os.makedirs(tmp)
+    try:
+        columns = []
+        for i, (name, column) in enumerate(data.items()):
+            kind, details = _write_column(tmp, i, column)
+            if kind is None:
+                log.warning("Not mapping %s: column %r (%s) has no mapped layout; loading it into memory", path, name, column.dtype)
+                return data, footprint
+            columns.append([name, kind, details])
+        event_slices = None
+        if isinstance(data, EventFrame):
+            _save(tmp, 'event_order.npy', data._event_order)
+            event_slices = [[event_type, start, stop] for event_type, (start, stop) in data._event_slices.items()]
+        with open(os.path.join(tmp, MANIFEST), 'w') as f:
+            json.dump({
+                'source': os.path.abspath(path), 'length': len(data), 'columns': columns,
+                'event_slices': event_slices, 'footprint': list(footprint),
+            }, f)
+        try:
+            os.rename(tmp, out)
+        except OSError:
+            # Already written by another process
+            pass
+        _drop_stale(path, fingerprint(path))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return read(path, key)
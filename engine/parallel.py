@@ -0,0 +1,192 @@
+import multiprocessing
+import os
+import pickle
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import pandas as pd
+
+from engine.events import EventFrame
+
+# Runs the strategy functions of a vertical in a process pool.
+#
+# The dataset is published once per run through shared memory: numeric
+# columns as their raw buffers, everything else dictionary-encoded (integer
+# codes in one segment, the pickled dictionary in another). Workers map the
+# segments and wrap them as a DataFrame without copying the numeric data or
+# pickling the frame. The pools are kept for the life of the process.
+#
+# `as_completed` runs them in threads of the dashboard process instead, on the
+# loaded frame itself: pandas and NumPy release the GIL in much of their work,
+# so the strategies overlap without copying or publishing anything.
+
+
+def _create_segment(payload):
+    segment = shared_memory.SharedMemory(create=True, size=max(len(payload), 1), name='forge_' + uuid.uuid4().hex[:16])
+    segment.buf[:len(payload)] = payload
+    return segment
+
+
+def _attach_segment(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 every attach is registered with the resource
+        # tracker, which would unlink the segment when the worker exits.
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class SharedFrame:
+    def __init__(self, data):
+        self.token = uuid.uuid4().hex
+        self.length = len(data)
+        self.event_slices = getattr(data, '_event_slices', None)
+        self.columns = []
+        self._segments = []
+        self.event_order = None
+        if self.event_slices is not None:
+            order = data._event_order
+            self.event_order = (len(order), order.dtype.str, self._publish(order.tobytes()))
+        for name, column in data.items():
+            if isinstance(column.dtype, np.dtype) and column.dtype.kind in 'biufcmM':
+                values = np.ascontiguousarray(column.to_numpy())
+                spec = (name, 'array', values.dtype.str, self._publish(values.tobytes()), None)
+            elif isinstance(column.dtype, pd.CategoricalDtype):
+                # Already dictionary-encoded: share the codes, keep the categories and their order
+                codes = column.cat.codes.to_numpy()
+                dictionary = self._publish(pickle.dumps((None, column.dtype), protocol=pickle.HIGHEST_PROTOCOL))
+                spec = (name, 'codes', codes.dtype.str, self._publish(codes.tobytes()), dictionary)
+            else:
+                codes, uniques = pd.factorize(column, use_na_sentinel=True)
+                codes = codes.astype(np.min_scalar_type(-len(uniques) - 1))
+                dictionary = self._publish(pickle.dumps((uniques, column.dtype), protocol=pickle.HIGHEST_PROTOCOL))
+                spec = (name, 'codes', codes.dtype.str, self._publish(codes.tobytes()), dictionary)
+            self.columns.append(spec)
+
+    def _publish(self, payload):
+        segment = _create_segment(payload)
+        self._segments.append(segment)
+        return segment.name
+
+    def __getstate__(self):
+        # Only the segment names travel to the workers
+        state = self.__dict__.copy()
+        state['_segments'] = []
+        return state
+
+    def attach(self):
+        segments = []
+        columns = {}
+        for name, kind, dtype, segment_name, dictionary in self.columns:
+            segment = _attach_segment(segment_name)
+            segments.append(segment)
+            values = np.ndarray((self.length,), dtype=np.dtype(dtype), buffer=segment.buf)
+            if kind == 'array':
+                columns[name] = values
+                continue
+            dictionary_segment = _attach_segment(dictionary)
+            uniques, original_dtype = pickle.loads(bytes(dictionary_segment.buf))
+            dictionary_segment.close()
+            if isinstance(original_dtype, pd.CategoricalDtype):
+                columns[name] = pd.Categorical.from_codes(values, dtype=original_dtype)
+                continue
+            categorical = pd.Categorical.from_codes(values, categories=uniques)
+            columns[name] = pd.Series(categorical).astype(original_dtype).array
+        frame = pd.DataFrame(columns, copy=False)
+        if self.event_slices is not None:
+            length, dtype, segment_name = self.event_order
+            segment = _attach_segment(segment_name)
+            segments.append(segment)
+            frame = EventFrame(frame)
+            frame._event_order = np.ndarray((length,), dtype=np.dtype(dtype), buffer=segment.buf)
+            frame._event_slices = self.event_slices
+        return frame, segments
+
+    def close(self):
+        for segment in self._segments:
+            segment.close()
+            segment.unlink()
+        self._segments = []
+
+
+# Worker side: the frame of the run currently being served
+_attached = {'token': None, 'frame': None, 'segments': []}
+
+
+def _run(shared, func):
+    if _attached['token'] != shared.token:
+        _attached['frame'] = None
+        for segment in _attached['segments']:
+            try:
+                segment.close()
+            except BufferError:
+                # Still referenced by a result of the previous run; the mapping goes with the worker
+                pass
+        _attached['frame'], _attached['segments'] = shared.attach()
+        _attached['token'] = shared.token
+    return func(_attached['frame'])
+
+
+# One pool per worker count: a session picking another count never shuts down
+# the pool other sessions are running on
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_executor(workers=None):
+    workers = workers or os.cpu_count()
+    with _pools_lock:
+        if workers not in _pools:
+            # Spawned workers do not inherit the server's threads and locks
+            _pools[workers] = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+        return _pools[workers]
+
+
+def run(data, funcs, workers=None):
+    # Results come back in the order of `funcs`, like the sequential loop
+    shared = SharedFrame(data)
+    try:
+        pool = get_executor(workers)
+        futures = {name: pool.submit(_run, shared, func) for name, func in funcs.items()}
+        return {name: future.result() for name, future in futures.items()}
+    finally:
+        shared.close()
+
+
+def as_completed(data, funcs, timeout=None):
+    # (name, result, error) for every strategy as it finishes; a strategy still
+    # running `timeout` seconds after it started yields a TimeoutError.
+    # Every run gets one thread per strategy, so all of them start right away
+    # and a strategy left running after its timeout holds no later run's thread.
+    pool = ThreadPoolExecutor(max(len(funcs), 1), thread_name_prefix='forge-strategy')
+    started = time.monotonic()
+    futures = {pool.submit(func, data): name for name, func in funcs.items()}
+    return _completed(pool, futures, started, timeout)
+
+
+def _completed(pool, futures, started, timeout):
+    order = list(futures)
+    pending = set(futures)
+    try:
+        while pending:
+            left = None if timeout is None else max(started + timeout - time.monotonic(), 0)
+            done, pending = wait(pending, timeout=left, return_when=FIRST_COMPLETED)
+            for future in sorted(done, key=order.index):
+                error = future.exception()
+                yield futures[future], None if error is not None else future.result(), error
+            if not done:
+                for future in sorted(pending, key=order.index):
+                    yield futures[future], None, TimeoutError('no result after %g seconds' % timeout)
+                pending = set()
+    finally:
+        # Threads left running finish in the background
+        pool.shutdown(wait=False, cancel_futures=True)
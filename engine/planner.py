@@ -0,0 +1,48 @@
+from engine import backends, sessions
+from engine.cache import results as result_cache
+
+# Runs the strategies of a vertical with one scan for all of their specs.
+#
+# The aggregations of the `@spec` strategies (engine.specs) are fused into one
+# backends.aggregate_many call: pandas groups each event type slice once per
+# distinct key, DuckDB computes every aggregate in one GROUPING SETS query.
+# The `@session_strategy` strategies share one session table (engine.sessions).
+# Hand-written strategies are called on the data as before.
+
+
+def specs(funcs):
+    return {name: func.spec for name, func in funcs.items() if getattr(func, 'spec', None) is not None}
+
+
+def iter_run(data, funcs):
+    # (name, result) pairs as they are ready: the specs after their fused scan,
+    # then the session strategies, then the hand-written ones
+    declared = specs(funcs)
+    if declared:
+        frames = backends.aggregate_many(data, [s.query() for s in declared.values()])
+        for (name, spec), frame in zip(declared.items(), frames):
+            yield name, spec.finish(frame)
+    figures = {name: func.session_figure for name, func in funcs.items() if getattr(func, 'session_figure', None) is not None}
+    if figures:
+        table = sessions.table(data)
+        for name, figure in figures.items():
+            yield name, figure(table)
+    for name, func in funcs.items():
+        if name not in declared and name not in figures:
+            yield name, func(data)
+
+
+def run(data, funcs):
+    results = dict(iter_run(data, funcs))
+    return {name: results[name] for name in funcs}
+
+
+def cached(dataset, funcs, data, variant=None):
+    # Cached results where present, the others computed together
+    keys = {name: result_cache.key(dataset, func, variant) for name, func in funcs.items()}
+    results = {name: result_cache.get(key) for name, key in keys.items()}
+    computed = run(data, {name: funcs[name] for name, result in results.items() if result is None})
+    for name, result in computed.items():
+        result_cache.put(keys[name], result)
+        results[name] = result
+    return results
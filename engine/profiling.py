@@ -0,0 +1,190 @@
+import argparse
+import cProfile
+import json
+import marshal
+import os
+import pstats
+import time
+import tracemalloc
+from collections import defaultdict
+
+from engine import registry, sessions
+
+# Opt-in profiling of strategy functions.
+#
+# Each function is called twice: once bare, to time it, and once under
+# cProfile and tracemalloc, whose overhead would skew the first measurement.
+# The bare call of a declared strategy runs its two steps one after the other,
+# so its time splits into the data phase (the `@spec` aggregate or the session
+# table) and the figure phase; hand-written strategies are timed whole.
+#
+# Profiles export as folded stacks (flamegraph.pl, speedscope), a pstats dump
+# (snakeviz, `python -m pstats`) and an allocation report.
+#
+#     python -m engine.profiling dummy_data/casual.csv --out profiles
+
+TOP_ALLOCATIONS = 10
+# Call paths below this many microseconds are left out of the folded stacks
+MIN_STACK_US = 100
+MAX_STACK_DEPTH = 128
+
+
+def _steps(func):
+    # (data step, figure step) of a declared strategy, None for a hand-written one
+    if getattr(func, 'spec', None) is not None:
+        return func.spec.aggregate, func.spec.figure
+    if getattr(func, 'session_figure', None) is not None:
+        return sessions.table, func.session_figure
+    return None
+
+
+class Profile:
+    def __init__(self, name, func, wall_s, data_s, profiler, snapshot, peak_bytes):
+        self.name = name
+        self.func = func
+        self.wall_s = wall_s
+        # None when the strategy is not split into steps
+        self.data_s = data_s
+        self.figure_s = None if data_s is None else wall_s - data_s
+        self.stats = pstats.Stats(profiler)
+        self.snapshot = snapshot
+        self.peak_bytes = peak_bytes
+
+    def summary(self):
+        return {
+            'strategy': self.name,
+            'function': self.func.__name__,
+            'total_s': round(self.wall_s, 4),
+            'data_s': None if self.data_s is None else round(self.data_s, 4),
+            'figure_s': None if self.figure_s is None else round(self.figure_s, 4),
+            'peak_mb': round(self.peak_bytes / 2**20, 2),
+        }
+
+    def allocations(self, top=TOP_ALLOCATIONS):
+        stats = self.snapshot.statistics('lineno')
+        return {
+            'strategy': self.name,
+            'function': '%s.%s' % (self.func.__module__, self.func.__qualname__),
+            'peak_bytes': self.peak_bytes,
+            'retained_bytes': sum(stat.size for stat in stats),
+            'retained_blocks': sum(stat.count for stat in stats),
+            'top': [
+                {'site': '%s:%d' % (stat.traceback[0].filename, stat.traceback[0].lineno),
+                 'bytes': stat.size, 'blocks': stat.count}
+                for stat in stats[:top]
+            ],
+        }
+
+
+def profile(name, func, data):
+    steps = _steps(func)
+    data_s = None
+    start = time.perf_counter()
+    if steps is None:
+        result = func(data)
+    else:
+        aggregate, figure = steps
+        prepared = aggregate(data)
+        data_s = time.perf_counter() - start
+        result = figure(prepared)
+    end = time.perf_counter()
+
+    # The snapshot is taken while the profiled result is alive: it holds what
+    # the function allocated and kept, the peak what it needed on the way.
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    profiler.enable()
+    kept = func(data)
+    profiler.disable()
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+
+    return result, Profile(name, func, end - start, data_s, profiler, snapshot, peak)
+
+
+def _label(func):
+    filename, lineno, name = func
+    if filename == '~':
+        return name
+    return '%s (%s:%d)' % (name, os.path.basename(filename), lineno)
+
+
+def folded_stacks(profiles):
+    # cProfile only records caller -> callee edges, so full stacks are rebuilt
+    # by walking the call graph and splitting a function's time between its
+    # callers in proportion to the time each of them spent in it.
+    lines = defaultdict(float)
+    for prof in profiles:
+        stats = prof.stats.stats
+        callees = defaultdict(dict)
+        for func, (_, _, _, _, callers) in stats.items():
+            for caller, edge in callers.items():
+                callees[caller][func] = edge
+
+        def walk(func, stack, path, self_s, total_s):
+            stack = stack + (_label(func),)
+            lines[';'.join(stack)] += self_s * 1e6
+            func_total = stats[func][3]
+            scale = total_s / func_total if func_total else 0
+            for callee, (_, _, callee_self, callee_total) in callees[func].items():
+                too_small = callee_total * scale * 1e6 < MIN_STACK_US
+                if callee in path or too_small or len(stack) >= MAX_STACK_DEPTH:
+                    continue
+                walk(callee, stack, path | {callee}, callee_self * scale, callee_total * scale)
+
+        for func, (_, _, self_s, total_s, callers) in stats.items():
+            if not callers:
+                walk(func, (prof.name,), {func}, self_s, total_s)
+    return ''.join('%s %d\n' % (stack, round(us)) for stack, us in lines.items() if round(us) > 0)
+
+
+def dump_stats(profiles):
+    stats = pstats.Stats()
+    stats.add(*[prof.stats for prof in profiles])
+    return marshal.dumps(stats.stats)
+
+
+def allocation_report(profiles, top=TOP_ALLOCATIONS):
+    return [prof.allocations(top) for prof in profiles]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Profile every strategy function of a vertical on a dataset."
+    )
+    parser.add_argument('dataset', help="CSV file, Parquet dataset or directory of daily files")
+    parser.add_argument('--vertical', help="strategy module to use (defaults to the dataset name)")
+    parser.add_argument('--out', default='profiles', help="output directory")
+    args = parser.parse_args()
+
+    dataset_name = os.path.splitext(os.path.basename(os.path.normpath(args.dataset)))[0]
+    vertical = args.vertical or registry.match(dataset_name)
+    data, _ = registry.VERTICALS[vertical].load(args.dataset)
+
+    profiles = []
+    for name, func in registry.VERTICALS[vertical].funcs().items():
+        _, prof = profile(name, func, data)
+        profiles.append(prof)
+        summary = prof.summary()
+        phases = ' ' * 36
+        if summary['data_s'] is not None:
+            phases = '  data %(data_s)9.4fs  figure %(figure_s)9.4fs' % summary
+        print('%-36s %9.4fs%s  %9.2f MB peak' % (
+            summary['function'], summary['total_s'], phases, summary['peak_mb']))
+
+    os.makedirs(args.out, exist_ok=True)
+    with open(os.path.join(args.out, vertical + '.folded'), 'w') as f:
+        f.write(folded_stacks(profiles))
+    with open(os.path.join(args.out, vertical + '.prof'), 'wb') as f:
+        f.write(dump_stats(profiles))
+    with open(os.path.join(args.out, vertical + '_allocations.json'), 'w') as f:
+        json.dump(allocation_report(profiles), f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
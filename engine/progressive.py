@@ -0,0 +1,88 @@
+import threading
+
+from engine import planner
+from engine.cache import results as result_cache
+
+# Progressive rendering of a vertical's strategies.
+#
+# The dashboard first draws every chart from a small user sample
+# (engine.sampling: SAMPLE_RATE of the users, read by DuckDB without loading
+# the dataset) and starts a Refinement: a background thread that loads the
+# dataset, runs the strategies through engine.planner.iter_run and puts each
+# exact result into the result cache as soon as it is ready. The page swaps
+# the approximate charts for the exact ones as they come in.
+#
+# Each browser session has at most one refinement. Every run of the page that
+# refines something else (another vertical, date range, ...) or nothing at all
+# (cached results, approximate first turned off) cancels it: it stops before
+# its next strategy, though a load or a strategy already running is not
+# interrupted.
+
+SAMPLE_RATE = 0.01
+# The first charts have no confidence intervals (engine.sampling.GROUPS): they
+# only stay up until the exact ones are ready
+GROUPS = 0
+# The session state entry holding the session's refinement
+STATE_KEY = 'forge-refinement'
+
+
+class Refinement:
+    def __init__(self, key, load, funcs, cache_keys):
+        self.key = key
+        self.load = load
+        self.funcs = funcs
+        self.cache_keys = cache_keys
+        self.results = {}
+        self.error = None
+        self.cancelled = threading.Event()
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='forge-refinement', daemon=True)
+
+    def _run(self):
+        try:
+            data = self.load()
+            if self.cancelled.is_set():
+                return
+            # Results cached meanwhile (engine.warmup, another session) are not computed again
+            funcs = {}
+            for name, func in self.funcs.items():
+                result = result_cache.get(self.cache_keys[name])
+                if result is None:
+                    funcs[name] = func
+                else:
+                    self.results[name] = result
+            for name, result in planner.iter_run(data, funcs):
+                result_cache.put(self.cache_keys[name], result)
+                self.results[name] = result
+                if self.cancelled.is_set():
+                    return
+        except Exception as error:
+            self.error = error
+        finally:
+            self.done.set()
+
+    def cancel(self):
+        self.cancelled.set()
+
+
+def cancel_stale(state, key):
+    # Called on every run of the page with the key it would refine (None when
+    # it refines nothing): a refinement of anything else is cancelled and dropped
+    current = state.get(STATE_KEY)
+    if current is not None and current.key != key:
+        current.cancel()
+        del state[STATE_KEY]
+
+
+def refine(state, key, load, funcs, cache_keys):
+    # The session's refinement of `key`, started unless it is already running.
+    # A failed one is retried on the next run of the page.
+    current = state.get(STATE_KEY)
+    if current is not None and current.key == key and current.error is None:
+        return current
+    if current is not None:
+        current.cancel()
+    refinement = Refinement(key, load, funcs, cache_keys)
+    state[STATE_KEY] = refinement
+    refinement.thread.start()
+    return refinement
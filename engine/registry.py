@@ -0,0 +1,96 @@
+import importlib
+import json
+import os
+
+from engine import backends
+from engine import datasets as dataset_io
+from engine import dtypes
+from engine import mapped
+from engine import requirements as required
+from engine import sqlite
+from engine.events import index_events
+
+# Static registry of the verticals listed in strategies/strategies.json.
+#
+# Reading the registry only parses the JSON file; a vertical's strategy module
+# (and with it plotly) is imported the first time one of its
+# strategies, requirements or partials is asked for.
+
+STRATEGIES_JSON = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'strategies', 'strategies.json')
+
+
+class Vertical:
+    def __init__(self, name, goals):
+        self.name = name
+        self.goals = goals
+        self._module = None
+
+    @property
+    def module(self):
+        if self._module is None:
+            self._module = importlib.import_module('strategies.' + self.name)
+        return self._module
+
+    def funcs(self):
+        return self.module.vertical_funcs()
+
+    def requirements(self):
+        return getattr(self.module, 'vertical_requirements', lambda: None)()
+
+    def columns(self, extra_columns=()):
+        requirements = self.requirements()
+        if requirements is None:
+            return None
+        columns = required.columns(requirements)
+        return columns + [c for c in extra_columns if c not in columns]
+
+    def event_types(self):
+        requirements = self.requirements()
+        return None if requirements is None else required.event_types(requirements)
+
+    def validate(self, data):
+        requirements = self.requirements()
+        if requirements is not None:
+            required.validate(data, requirements)
+        return data
+
+    def dtype_plan(self, extra_columns=()):
+        columns = self.columns(extra_columns)
+        return None if columns is None else dtypes.plan(columns)
+
+    def load(self, path, backend='pandas', extra_columns=()):
+        # The dataset as the strategies get it, and its memory footprint before and after the dtype plan.
+        # `extra_columns` are loaded on top of the required ones, e.g. user_id for sampling.
+        columns = self.columns(extra_columns)
+        if backend == 'duckdb' or sqlite.is_store(path):
+            # Aggregated in place by DuckDB or SQLite on every query; nothing is held in memory
+            return self.validate(backends.open_dataset(path, columns, self.event_types())), None
+        # Loaded once per host: later loads map the columnar copy (engine.mapped)
+        key = (columns, self.event_types(), self.dtype_plan(extra_columns))
+        cached = mapped.read(path, key) if mapped.enabled() else None
+        if cached is not None:
+            return cached
+        data = self.validate(dataset_io.load(path, columns, self.event_types()))
+        data, footprint = dtypes.optimize(data, self.dtype_plan(extra_columns))
+        data = index_events(data)
+        return mapped.write(path, key, data, footprint) if mapped.enabled() else (data, footprint)
+
+    def partials(self):
+        return getattr(self.module, 'vertical_partials', lambda: None)()
+
+
+def load(path=STRATEGIES_JSON):
+    with open(path) as f:
+        strategies = json.load(f)
+    return {name: Vertical(name, goals) for name, goals in strategies.items()}
+
+
+VERTICALS = load()
+
+
+def match(name, verticals=VERTICALS):
+    # Dataset names are the vertical, optionally followed by `_<title>`
+    for vertical in sorted(verticals, key=len, reverse=True):
+        if name == vertical or name.startswith(vertical + '_'):
+            return vertical
+    return None
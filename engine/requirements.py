@@ -0,0 +1,58 @@
+# Columns and event types each strategy reads, declared next to
+# vertical_funcs() as `vertical_requirements()`:
+#
+#     def vertical_requirements():
+#         return {
+#             "Kill-to-Death Ratios": Requires(['user_id', 'kills', 'deaths']),
+#             "Weapon Usage Analysis": Requires(['customization_id'], ['combat']),
+#         }
+#
+# A vertical's dataset is loaded with the union of its strategies'
+# requirements: only those columns (plus event_type and client_ts, which order
+# the rows and drive date ranges, see engine.events) and, when every strategy
+# restricts itself to some event types, only those rows.
+
+
+class Requires:
+    def __init__(self, columns, event_types=None):
+        self.columns = list(columns)
+        self.event_types = list(event_types) if event_types is not None else None
+
+
+def columns(requirements):
+    union = ['event_type', 'client_ts']
+    for requirement in requirements.values():
+        union += [c for c in requirement.columns if c not in union]
+    return union
+
+
+def event_types(requirements):
+    union = []
+    for requirement in requirements.values():
+        if requirement.event_types is None:
+            return None
+        union += [e for e in requirement.event_types if e not in union]
+    return union
+
+
+def _quoted(names):
+    names = ["'%s'" % name for name in names]
+    if len(names) == 1:
+        return names[0]
+    return '%s and %s' % (', '.join(names[:-1]), names[-1])
+
+
+def validate(data, requirements):
+    missing = {}
+    for name, requirement in requirements.items():
+        for column in requirement.columns:
+            if column not in data.columns:
+                missing.setdefault(column, []).append(name)
+    if missing:
+        strategies = sorted({name for names in missing.values() for name in names})
+        raise KeyError("%s %s %s missing. Required by: %s." % (
+            'Columns' if len(missing) > 1 else 'Column',
+            _quoted(missing),
+            'are' if len(missing) > 1 else 'is',
+            ', '.join(strategies),
+        ))
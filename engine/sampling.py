@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+
+from engine import dtypes, planner
+from engine.backends import DuckDBEvents
+from engine.events import EventFrame, index_events
+
+# User-consistent sampling for approximate previews of large datasets.
+#
+# A user is kept when the hash of its user_id falls in the first `rate` of
+# the hash range, so all of a user's events (and sessions) are kept or
+# dropped together and per-user and per-session strategies stay meaningful.
+# The same users are sampled on every run. Counts and sums of the sample are
+# scaled back up by 1 / rate; means and other non-additive aggregates are
+# not (engine.specs: Spec.additive).
+#
+# On DuckDB the distinct user_ids are hashed the same way and the sampled
+# users' rows are selected in the database and loaded into pandas, so both
+# backends sample the same users.
+#
+# Confidence intervals come from random groups: the sampled users are split
+# by a second hash into GROUPS disjoint groups, every strategy also runs on
+# each group, and the spread of the group estimates gives a 95% interval for
+# every bar, pie slice share and indicator value whose categories line up
+# across groups.
+
+GROUPS = 5
+# Student t quantile (97.5%, GROUPS - 1 degrees of freedom)
+T_95 = 2.776
+HASH_RANGE = 2**64
+# Users are assigned to groups by a second hash, independent of the sampling one
+GROUP_KEY = 'forge-ci-groups!'
+
+
+def _hashes(user_ids, key=None):
+    if key is None:
+        return pd.util.hash_pandas_object(user_ids, index=False).to_numpy()
+    return pd.util.hash_pandas_object(user_ids, index=False, hash_key=key).to_numpy()
+
+
+def _rows(data, mask):
+    if isinstance(data, EventFrame):
+        return data.subset(mask)
+    return data[mask].reset_index(drop=True)
+
+
+def sample(data, rate):
+    # The rows of the users whose user_id hashes into the first `rate` of the range, as a loaded frame
+    bound = np.uint64(min(int(rate * HASH_RANGE), HASH_RANGE - 1))
+    if isinstance(data, DuckDBEvents):
+        # The same users as on pandas: the distinct user_ids are hashed here
+        user_ids = data.user_ids()
+        columns = data.columns + [c for c in ['user_id'] if c not in data.columns]
+        frame, _ = dtypes.optimize(data.user_rows(user_ids[_hashes(user_ids) < bound], columns))
+        return index_events(frame)
+    if not isinstance(data, pd.DataFrame):
+        raise ValueError("Sampling needs the pandas or duckdb backend")
+    return _rows(data, _hashes(data['user_id']) < bound)
+
+
+def groups(data, count=GROUPS):
+    # Disjoint random groups of the users of a sample
+    codes = np.minimum(_hashes(data['user_id'], GROUP_KEY) // np.uint64(HASH_RANGE // count), count - 1)
+    return [_rows(data, codes == g) for g in range(count)]
+
+
+def additive(func):
+    # Hand-written and session strategies draw counts
+    spec = getattr(func, 'spec', None)
+    return spec is None or spec.additive()
+
+
+def _trace_values(trace):
+    # (labels, values) of a trace, None for traces without estimates
+    if trace.type == 'bar' and trace.y is not None:
+        return trace.x, np.asarray(trace.y, dtype=float)
+    if trace.type == 'pie' and trace.values is not None:
+        return trace.labels, np.asarray(trace.values, dtype=float)
+    if trace.type == 'indicator' and trace.value is not None:
+        return None, np.array([float(trace.value)])
+    return None
+
+
+def _aligned(labels, size, group_labels, group_values):
+    # A group's values in the order of the sample's labels; categories missing from the group count 0
+    if labels is None:
+        return group_values if len(group_values) == size else None
+    positions = {label: i for i, label in enumerate(np.asarray(labels).tolist())}
+    values = np.zeros(len(positions))
+    for label, value in zip(np.asarray(group_labels).tolist(), group_values):
+        if label not in positions:
+            return None
+        values[positions[label]] = value
+    return values
+
+
+def _interval(estimates):
+    # Half width of the 95% interval from the group estimates
+    return T_95 * estimates.std(axis=0, ddof=1) / np.sqrt(len(estimates))
+
+
+def estimate(result, group_results, rate, scaled=True):
+    fig, explanation, recommendation = result
+    scale = 1 / rate if scaled else 1
+    group_scale = len(group_results) / rate if scaled else 1
+    for i, trace in enumerate(fig.data):
+        found = _trace_values(trace)
+        if found is None:
+            continue
+        labels, values = found
+        groups = []
+        for group_result in group_results:
+            group_fig = group_result[0] if group_result is not None else None
+            group_found = _trace_values(group_fig.data[i]) if group_fig is not None and i < len(group_fig.data) else None
+            groups.append(None if group_found is None else _aligned(labels, len(values), *group_found))
+        lined_up = len(groups) > 0 and all(g is not None for g in groups)
+        groups = np.array(groups) if lined_up else None
+        if trace.type == 'bar':
+            trace.y = values * scale
+            if scaled and trace.text is not None:
+                trace.text = np.round(values * scale).astype('int64')
+            if lined_up:
+                trace.error_y = dict(type='data', array=_interval(groups * group_scale), visible=True)
+        elif trace.type == 'pie':
+            trace.values = values * scale
+            if lined_up:
+                # Slice shares: the interval of each slice's percentage
+                totals = groups.sum(axis=1, keepdims=True)
+                shares = np.divide(groups, totals, out=np.zeros_like(groups), where=totals > 0)
+                trace.text = ['±%.1f%%' % (100 * half) for half in _interval(shares)]
+                trace.textinfo = (trace.textinfo or 'percent') + '+text'
+        else:
+            trace.value = values[0] * scale
+            if scaled and trace.delta is not None and trace.delta.reference is not None:
+                trace.delta.reference = trace.delta.reference * scale
+            if lined_up:
+                half = _interval(groups * group_scale)[0]
+                trace.title.text = '%s<br><sub>95%% CI %.0f – %.0f</sub>' % (trace.title.text or '', values[0] * scale - half, values[0] * scale + half)
+    return fig, explanation, recommendation
+
+
+def _group_run(group, funcs):
+    # A strategy failing on a group too small for it (no rows of its event
+    # type, ...) only loses its interval
+    try:
+        return planner.run(group, funcs)
+    except (ValueError, KeyError, IndexError):
+        results = {}
+        for name, func in funcs.items():
+            try:
+                results[name] = func(group)
+            except (ValueError, KeyError, IndexError):
+                results[name] = None
+        return results
+
+
+def run(data, funcs, rate, count=GROUPS):
+    # Approximate results of the strategies from a `rate` sample of the users,
+    # with intervals from `count` groups (none with 0)
+    rows = sample(data, rate)
+    results = planner.run(rows, funcs)
+    group_results = [_group_run(group, funcs) for group in groups(rows, count)] if count else []
+    return {
+        name: estimate(result, [r[name] for r in group_results], rate, additive(funcs[name]))
+        for name, result in results.items()
+    }
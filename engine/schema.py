@@ -0,0 +1,63 @@
+# Event schema of the Forge exports: column domains and, per vertical, the
+# event types its strategies look at. Used to build synthetic datasets.
+
+SESSION_EVENTS = ['session_start', 'session_end']
+
+# Gameplay event types (besides session start/end) emitted by each vertical
+VERTICAL_EVENTS = {
+    'adventure': ['progression', 'resource'],
+    'casual': ['progression', 'ad', 'resource'],
+    'educational': ['challenge', 'topic', 'progression'],
+    'hardcore': ['progression', 'guild_interaction', 'business'],
+    'hypercasual': ['progression', 'ad'],
+    'midcore': ['progression', 'business', 'resource'],
+    'puzzle': ['progression', 'hint', 'ad'],
+    'rpg': ['progression', 'resource', 'business'],
+    'shooter': ['combat', 'progression', 'business'],
+    'simulation': ['progression', 'resource', 'business'],
+    'sports': ['progression', 'customization', 'business'],
+    'strategy': ['progression', 'resource', 'business'],
+}
+
+# Categorical columns: the event types that carry them and their values
+CATEGORIES = {
+    'progression_01': (['progression', 'challenge', 'combat'], ['world_%d' % i for i in range(1, 9)]),
+    'progression_02': (['progression', 'hint', 'topic'], ['level_%d' % i for i in range(1, 51)]),
+    'currency': (['resource'], ['gold', 'gems', 'coins', 'energy', 'wood']),
+    'item_type': (['business'], ['consumable', 'non_consumable', 'subscription']),
+    'ad_placement': (['ad', 'progression'], ['pre_game', 'post_game', 'rewarded', 'banner']),
+    'ad_action': (['ad'], ['viewed', 'clicked', 'skipped']),
+    'customization_id': (['combat', 'customization'], ['weapon_%d' % i for i in range(1, 41)]),
+    'customization_type': (['customization'], ['avatar', 'team', 'jersey', 'ball']),
+    'match_phase': (['progression'], ['first_half', 'second_half', 'overtime', 'penalties']),
+    'age_group': (None, ['6-9', '10-13', '14-17', '18+']),
+}
+
+# Columns only some verticals export
+VERTICAL_COLUMNS = {
+    'customization_id': ['shooter'],
+    'customization_type': ['sports'],
+    'match_phase': ['sports'],
+    'age_group': ['educational'],
+    'kills': ['shooter'],
+    'deaths': ['shooter'],
+}
+
+# Numeric columns: the event types that carry them
+NUMERICS = {
+    'score': ['progression', 'challenge'],
+    'amount': ['resource', 'business'],
+    'kills': ['combat'],
+    'deaths': ['combat'],
+    'session_length': ['session_end'],
+}
+
+COLUMNS = (
+    ['user_id', 'session_id', 'event_type', 'client_ts']
+    + list(CATEGORIES)
+    + list(NUMERICS)
+)
+
+
+def vertical_columns(vertical):
+    return [c for c in COLUMNS if vertical in VERTICAL_COLUMNS.get(c, [vertical])]
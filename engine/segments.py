@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+# Vectorized bucketing for the Short/Medium/Long style classifiers.
+#
+# Rules are `(label, op, threshold)` checked in order, first match wins, and
+# anything matching no rule (missing values included) gets the default label,
+# exactly like the chained `a if x < t else b if x > u else c` expressions.
+
+_OPS = {'<': np.less, '<=': np.less_equal, '>': np.greater, '>=': np.greater_equal}
+
+
+class Segmentation:
+    def __init__(self, rules, default, labels=None):
+        self.rules = rules
+        self.default = default
+        # Category order of the categorical output
+        self.labels = labels or [label for label, _, _ in rules] + [default]
+
+    def __repr__(self):
+        # Part of the result cache key of the strategies using the segmentation
+        return 'Segmentation(%r, default=%r, labels=%r)' % (self.rules, self.default, self.labels)
+
+    def codes(self, values):
+        values = np.asarray(values, dtype=float)
+        codes = np.full(len(values), self.labels.index(self.default), dtype=np.int8)
+        # Apply the rules last to first so earlier rules overwrite later ones
+        for label, op, threshold in reversed(self.rules):
+            codes[_OPS[op](values, threshold)] = self.labels.index(label)
+        return codes
+
+    def assign(self, values):
+        return pd.Categorical.from_codes(self.codes(values), categories=self.labels)
+
+    def counts(self, values, name='category'):
+        # Same shape as `value_counts().reset_index()`: non-empty buckets, most frequent first
+        counts = np.bincount(self.codes(values), minlength=len(self.labels))
+        frame = pd.DataFrame({name: self.labels, 'count': counts})
+        frame = frame[frame['count'] > 0].sort_values('count', ascending=False, kind='stable')
+        return frame.reset_index(drop=True)
+
+
+# Session length in seconds (or events per session, depending on the vertical)
+SESSION_LENGTH = Segmentation(
+    [('Short', '<', 300), ('Long', '>', 1200)], default='Medium', labels=['Short', 'Medium', 'Long']
+)
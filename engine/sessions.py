@@ -0,0 +1,109 @@
+import functools
+
+import numpy as np
+import pandas as pd
+
+from engine import backends
+from engine.events import TIMESTAMP
+from engine.streaming import Partial
+
+# Session table of a vertical's dataset.
+#
+# One row per session_id, indexed by it and sorted:
+#
+#     user_id    the session's user (when the dataset has user_id)
+#     events     rows of the session
+#     first_ts   timestamp of its first and last event
+#     last_ts
+#     start      timestamp of its session_start and session_end events,
+#     end        missing without one
+#     duration   end - start
+#
+# A loaded frame is sessionized without sorting or grouping it: session_id is
+# factorized once and every column is one O(rows) scatter reduction over the
+# session codes (np.bincount, np.fmin.at, ...). On DuckDB and SQLite the table
+# is a handful of in-database group-bys.
+#
+# Strategies declared with `@session_strategy` draw their figure from the
+# table; engine.planner builds it once for all of them.
+
+START = 'session_start'
+END = 'session_end'
+
+# How two tables of the same sessions (two chunks of a dataset) combine
+_MERGE = {'user_id': 'first', 'events': 'sum', 'first_ts': 'min', 'last_ts': 'max', 'start': 'min', 'end': 'max'}
+
+
+def _reduce(func, labels, values, count):
+    # Per-session fmin/fmax: missing values never win over present ones
+    out = np.full(count, np.nan)
+    func.at(out, labels, values)
+    return out
+
+
+def _frame_table(data):
+    codes, uniques = pd.factorize(data['session_id'], sort=True)
+    rows = np.flatnonzero(codes >= 0)
+    labels, count = codes[rows], len(uniques)
+    timestamps = data[TIMESTAMP].to_numpy(dtype='float64', na_value=np.nan)[rows]
+
+    columns = {}
+    if 'user_id' in data.columns:
+        # The user of the session's first row
+        first = np.full(count, len(rows))
+        np.minimum.at(first, labels, np.arange(len(rows)))
+        columns['user_id'] = data['user_id'].take(rows[first]).to_numpy()
+    columns['events'] = np.bincount(labels, minlength=count).astype('int64')
+    columns['first_ts'] = _reduce(np.fmin, labels, timestamps, count)
+    columns['last_ts'] = _reduce(np.fmax, labels, timestamps, count)
+    for name, event_type, func in [('start', START, np.fmin), ('end', END, np.fmax)]:
+        marked = (data['event_type'] == event_type).to_numpy()[rows]
+        columns[name] = _reduce(func, labels[marked], timestamps[marked], count)
+    table = pd.DataFrame(columns, index=pd.Index(np.asarray(uniques), name='session_id'))
+    table['duration'] = table['end'] - table['start']
+    return table
+
+
+def _query_table(data):
+    queries = [
+        ('session_id', {'events': (None, 'size'), 'first_ts': (TIMESTAMP, 'min'), 'last_ts': (TIMESTAMP, 'max')}, None),
+        ('session_id', {'start': (TIMESTAMP, 'min')}, START),
+        ('session_id', {'end': (TIMESTAMP, 'max')}, END),
+    ]
+    if 'user_id' in data.columns:
+        queries.append((['session_id', 'user_id'], {'events': (None, 'size')}, None))
+    frames = backends.aggregate_many(data, queries)
+    table = frames[0].join(frames[1]).join(frames[2])
+    if len(frames) > 3:
+        users = frames[3].reset_index('user_id').groupby(level=0)['user_id'].first()
+        table.insert(0, 'user_id', users.reindex(table.index).to_numpy())
+    table['duration'] = table['end'] - table['start']
+    return table
+
+
+def table(data):
+    if isinstance(data, pd.DataFrame):
+        return _frame_table(data)
+    return _query_table(data)
+
+
+def merge(a, b):
+    # Tables of two chunks: sessions that span both add up
+    both = pd.concat([a, b])
+    merged = both.groupby(level=0, sort=True).agg({c: f for c, f in _MERGE.items() if c in both.columns})
+    merged['duration'] = merged['end'] - merged['start']
+    return merged[list(a.columns)]
+
+
+def session_strategy(figure):
+    @functools.wraps(figure)
+    def strategy(data):
+        return figure(table(data))
+
+    strategy.session_figure = figure
+    return strategy
+
+
+def session_partial(strategy):
+    # Streams like a spec: one table per chunk, merged, then the figure
+    return Partial(table, strategy.session_figure, merge=merge)
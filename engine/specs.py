@@ -0,0 +1,70 @@
+import functools
+
+from engine import backends
+from engine.streaming import Partial
+
+# Declarative strategies: one aggregation of the dataset, then a figure.
+#
+# Most strategies filter one event type, group by a column and count or sum.
+# Declared with `@spec`, the decorated function only draws the figure from
+# the aggregate; the aggregation itself is left to engine.planner, which runs
+# the aggregations of every spec of a vertical in a single scan:
+#
+#     @spec('currency', event_type='resource')
+#     def resource_usage(counts):
+#         ...  # counts: rows per currency, as a Series
+#
+#     @spec('user_id', aggs={'kills': ('kills', 'sum'), 'deaths': ('deaths', 'sum')})
+#     def kill_to_death_ratios(totals):
+#         ...  # totals: a frame with one column per aggregate
+#
+# The decorated name is still a plain `func(data)` strategy, so hand-written
+# strategies and specs mix freely in vertical_funcs().
+
+_ADDITIVE = ('size', 'count', 'sum')
+
+
+class Spec:
+    def __init__(self, figure, by, event_type=None, aggs=None):
+        self.figure = figure
+        self.by = by
+        self.event_type = event_type
+        self.aggs = aggs
+
+    def __repr__(self):
+        # The query only: part of the strategy's result cache key (engine.cache)
+        return 'Spec(%r, event_type=%r, aggs=%r)' % (self.by, self.event_type, self.aggs)
+
+    def query(self):
+        return (self.by, self.aggs or {'count': (None, 'size')}, self.event_type)
+
+    def finish(self, frame):
+        # Without `aggs` the figure gets the row counts as a Series
+        return self.figure(frame['count'] if self.aggs is None else frame)
+
+    def aggregate(self, data):
+        by, aggs, event_type = self.query()
+        frame = backends.aggregate(data, by, aggs, event_type)
+        return frame['count'] if self.aggs is None else frame
+
+    def additive(self):
+        # Counts and sums of chunks (or of disjoint groups of users) add up; means, minima and maxima do not
+        return all(func in _ADDITIVE for _, func in self.query()[1].values())
+
+    def partial(self):
+        if not self.additive():
+            return None
+        return Partial(self.aggregate, self.figure)
+
+
+def spec(by, event_type=None, aggs=None):
+    def decorate(figure):
+        declared = Spec(figure, by, event_type, aggs)
+
+        @functools.wraps(figure)
+        def strategy(data):
+            return figure(declared.aggregate(data))
+
+        strategy.spec = declared
+        return strategy
+    return decorate
@@ -0,0 +1,96 @@
+import argparse
+import os
+import sqlite3
+import urllib.parse
+
+import pandas as pd
+
+from engine.events import TIMESTAMP, calendar
+
+# Local SQLite event store of a vertical's dataset.
+#
+# `python -m engine.sqlite dummy_data/casual.csv` writes dummy_data/casual.sqlite:
+# one `events` table with the rows of the dataset (CSV, partitioned Parquet or
+# a directory of daily files), its calendar columns (engine.events) and
+# indexes on the columns strategies filter and group on. Dashboard processes open the store read-only and run the
+# strategies' aggregations in the database (backends.SQLiteEvents), so only
+# the aggregated results come back to Python and any number of processes can
+# share one store.
+
+SQLITE_SUFFIX = '.sqlite'
+TABLE = 'events'
+INDEXED = ['event_type', 'session_id', 'user_id', 'client_ts']
+
+
+def is_store(path):
+    return path.endswith(SQLITE_SUFFIX) and os.path.isfile(path)
+
+
+def connect(path):
+    # Read-only, so concurrent readers never lock each other out. The path is
+    # URL-quoted: '?', '#' and '%' are part of the URI syntax.
+    uri = 'file:%s?mode=ro' % urllib.parse.quote(os.path.abspath(path))
+    return sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+
+def ingest(path, out_path=None, chunksize=1_000_000):
+    from engine import streaming
+
+    if out_path is None:
+        out_path = os.path.splitext(path.rstrip(os.sep))[0] + SQLITE_SUFFIX
+    # Built next to the store and swapped in whole: readers never see a partial store
+    tmp_path = out_path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    connection = sqlite3.connect(tmp_path)
+    try:
+        connection.execute('PRAGMA journal_mode = OFF')
+        connection.execute('PRAGMA synchronous = OFF')
+        columns = []
+        for chunk in streaming.iter_chunks(path, chunksize):
+            if TIMESTAMP in chunk.columns:
+                chunk = chunk.assign(**calendar(chunk[TIMESTAMP].to_numpy(dtype='float64', na_value=float('nan'))))
+            chunk.to_sql(TABLE, connection, if_exists='append', index=False)
+            columns = columns or list(chunk.columns)
+        for column in INDEXED:
+            if column in columns:
+                connection.execute('CREATE INDEX "%s_%s" ON %s ("%s")' % (TABLE, column, TABLE, column))
+        connection.execute('ANALYZE')
+        connection.commit()
+    finally:
+        connection.close()
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+def read(path, columns=None, event_types=None):
+    connection = connect(path)
+    try:
+        names = [row[1] for row in connection.execute('PRAGMA table_info(%s)' % TABLE)]
+        if columns is not None:
+            names = [c for c in names if c in set(columns) | {'event_type'}]
+        sql = 'SELECT %s FROM %s' % (', '.join('"%s"' % c for c in names), TABLE)
+        params = []
+        if event_types is not None:
+            sql += ' WHERE event_type IN (%s)' % ', '.join('?' for _ in event_types)
+            params = list(event_types)
+        return pd.read_sql_query(sql, connection, params=params)
+    finally:
+        connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load per-vertical datasets into indexed SQLite event stores.")
+    parser.add_argument('paths', nargs='+', help="datasets (CSV, partitioned Parquet or directories of daily files)")
+    parser.add_argument('--out', help="output file (default: <dataset>.sqlite next to the dataset)")
+    parser.add_argument('--chunk-rows', type=int, default=1_000_000, help="rows inserted per batch")
+    args = parser.parse_args()
+
+    if args.out and len(args.paths) > 1:
+        parser.error('--out takes a single dataset')
+    for path in args.paths:
+        print(path, '->', ingest(path, args.out, args.chunk_rows))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+import os
+import threading
+
+from engine import dtypes, registry
+from engine.cache import ByteLRU, fingerprint
+
+# Process-wide store of loaded datasets, shared by every session of the dashboard.
+#
+# Each dataset is loaded once (Vertical.load) and kept while it fits a byte
+# budget, measured as the frame's deep memory usage. Past the budget, the least
+# recently used datasets are dropped. A dataset larger than the whole budget is
+# not kept and is loaded again on every run. Hits, misses, evictions and such
+# too large loads are counted per dataset to help size the budget.
+#
+# Sessions asking for a dataset that is being loaded wait for that load
+# instead of starting their own. A changed dataset file is a new entry, and the
+# old version's entry is dropped when the new one is loaded.
+
+MEMORY_BUDGET = int(os.environ.get('FORGE_DATASET_MEMORY_BYTES', 2 << 30))
+EVENTS = ('hits', 'misses', 'evictions', 'too_large')
+
+
+class DatasetStore:
+    def __init__(self, memory_budget=MEMORY_BUDGET):
+        self.frames = ByteLRU(memory_budget)
+        self.counts = {}
+        self._lock = threading.Lock()
+        self._loading = {}
+
+    def _count(self, name, event):
+        with self._lock:
+            counts = self.counts.setdefault(name, dict.fromkeys(EVENTS, 0))
+            counts[event] += 1
+
+    def get(self, name, path, extra_columns=(), load=True):
+        # The dataset and its footprint (Vertical.load). Without `load`, only a
+        # dataset already in the store is returned, (None, None) otherwise.
+        key = (name, path, fingerprint(path), tuple(extra_columns))
+        found = self.frames.get(key)
+        if found is not None:
+            self._count(name, 'hits')
+            return found
+        if not load:
+            return None, None
+        with self._lock:
+            loading = self._loading.setdefault(key, threading.Lock())
+        try:
+            with loading:
+                found = self.frames.get(key)
+                if found is not None:
+                    self._count(name, 'hits')
+                    return found
+                self._count(name, 'misses')
+                data, footprint = registry.VERTICALS[registry.match(name)].load(path, extra_columns=extra_columns)
+                for old in self.frames.keys():
+                    if old[:2] == key[:2] and old[2] != key[2]:
+                        self.frames.pop(old)
+                size = dtypes.footprint(data)
+                if size > self.frames.budget:
+                    self._count(name, 'too_large')
+                for evicted in self.frames.put(key, (data, footprint), size):
+                    self._count(evicted[0], 'evictions')
+        finally:
+            # Also after a failed load: the next session tries again
+            with self._lock:
+                self._loading.pop(key, None)
+        return data, footprint
+
+    def stats(self):
+        # One row per dataset: its counts and the bytes it holds in the store
+        sizes = {}
+        for key, size in self.frames.sizes().items():
+            sizes[key[0]] = sizes.get(key[0], 0) + size
+        with self._lock:
+            counts = {name: dict(c) for name, c in self.counts.items()}
+        return [
+            dict(dataset=name, resident_mb=round(sizes.get(name, 0) / 2**20, 1), **counts.get(name, dict.fromkeys(EVENTS, 0)))
+            for name in sorted(set(counts) | set(sizes))
+        ]
+
+    def clear(self):
+        self.frames.clear()
+
+
+datasets = DatasetStore()
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from engine import columnar
+from engine import datasets as dataset_io
+
+# Chunked execution for datasets that do not fit in memory.
+#
+# A strategy that supports streaming is described by a Partial: `aggregate`
+# turns one chunk into a small partial state (counts per key, sums, ...),
+# `merge` combines two states and `finish` draws the figure from the merged
+# state. The in-memory strategy is `finish(aggregate(data))`, so both paths
+# render the same figure. Peak memory is one chunk plus the partial states.
+
+
+def add(a, b):
+    total = a.add(b, fill_value=0)
+    # Aligning on the union of keys goes through float; restore integer counts
+    if isinstance(total, pd.Series):
+        return total.astype(np.result_type(a.dtype, b.dtype))
+    return total.astype({c: np.result_type(a[c].dtype, b[c].dtype) for c in total.columns})
+
+
+class Partial:
+    def __init__(self, aggregate, finish, merge=add):
+        self.aggregate = aggregate
+        self.finish = finish
+        self.merge = merge
+
+
+def iter_chunks(path, chunksize, columns=None, event_types=None):
+    if dataset_io.is_append_store(path):
+        for f in dataset_io.daily_files(path):
+            yield from iter_chunks(f, chunksize, columns, event_types)
+        return
+    if path.endswith(columnar.PARQUET_SUFFIX):
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(path, format='parquet', partitioning='hive')
+        if columns is not None:
+            columns = [c for c in dataset.schema.names if c in set(columns) | {columnar.PARTITION_COLUMN}]
+        row_filter = None
+        if event_types is not None:
+            row_filter = ds.field(columnar.PARTITION_COLUMN).isin(list(event_types))
+        for batch in dataset.to_batches(columns=columns, filter=row_filter, batch_size=chunksize):
+            if batch.num_rows:
+                yield batch.to_pandas()
+        return
+
+    usecols = None
+    if columns is not None:
+        wanted = set(columns) | {'event_type'}
+        usecols = lambda c: c in wanted
+    for chunk in pd.read_csv(path, usecols=usecols, chunksize=chunksize):
+        if event_types is not None:
+            chunk = chunk[chunk['event_type'].isin(event_types)]
+        yield chunk
+
+
+def fold(states, partials, chunks):
+    # One pass over the chunks feeds every partial
+    for chunk in chunks:
+        for name, partial in partials.items():
+            state = partial.aggregate(chunk)
+            states[name] = partial.merge(states[name], state) if name in states else state
+    return states
+
+
+def run(path, partials, columns=None, event_types=None, chunksize=1_000_000):
+    states = fold({}, partials, iter_chunks(path, chunksize, columns, event_types))
+    return {name: partial.finish(states[name]) for name, partial in partials.items() if name in states}
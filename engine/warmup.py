@@ -0,0 +1,84 @@
+import argparse
+import os
+import threading
+
+from engine import datasets as dataset_io
+from engine import planner, registry
+from engine.cache import fingerprint
+from engine.store import datasets as dataset_store
+
+# Background warmup of a freshly started dashboard process.
+#
+# With FORGE_WARMUP set, the first run of Demo.py starts a thread that loads
+# the default vertical's dataset into the dataset store (engine.store) and
+# computes its strategy results into the result cache while the page is being
+# sent. FORGE_WARMUP=1 warms the first
+# dataset of the selectbox, FORGE_WARMUP=<vertical> a given one. Pages of the
+# vertical being warmed wait for the warmup (`wait`) and read its results from
+# the cache instead of computing them a second time. Running
+# `python -m engine.warmup` before the server fills the on-disk result cache.
+
+WARMUP_ENV = 'FORGE_WARMUP'
+
+_lock = threading.Lock()
+_thread = None
+_name = None
+
+
+def default_vertical(datasets):
+    wanted = os.environ.get(WARMUP_ENV, '')
+    if wanted in datasets:
+        return wanted
+    return next(iter(datasets), None)
+
+
+def preload(name, path, keep=True):
+    vertical = registry.VERTICALS[registry.match(name)]
+    columns, event_types = vertical.columns(), vertical.event_types()
+    # Kept in the dataset store for the pages that ask for it
+    data, _ = dataset_store.get(name, path) if keep else vertical.load(path)
+    dataset_fingerprint = fingerprint(path)
+    planner.cached(dataset_fingerprint, vertical.funcs(), data, variant=(columns, event_types))
+    return data
+
+
+def start(datasets):
+    global _thread, _name
+    if not os.environ.get(WARMUP_ENV):
+        return None
+    with _lock:
+        if _thread is None:
+            name = default_vertical(datasets)
+            if name is None:
+                return None
+            _name = name
+            _thread = threading.Thread(target=preload, args=(name, datasets[name]), name='forge-warmup', daemon=True)
+            _thread.start()
+    return _thread
+
+
+def wait(name):
+    # Blocks until the warmup of `name` is done; False when it was not warmed
+    if _thread is None or _name != name:
+        return False
+    _thread.join()
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute the strategy results of datasets into the result cache.")
+    parser.add_argument('data_dir', nargs='?', default='dummy_data', help="directory of per-vertical datasets")
+    parser.add_argument('verticals', nargs='*', help="datasets to warm (default: all)")
+    args = parser.parse_args()
+
+    datasets = {
+        name: path for name, path in dataset_io.list_datasets(args.data_dir).items()
+        if registry.match(name) and (not args.verticals or name in args.verticals)
+    }
+    for name, path in datasets.items():
+        preload(name, path, keep=False)
+        print('warmed', name)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,21 @@
 import pandas as pd
 import plotly.graph_objects as go
 
+from engine.figures import top_n
+from engine.requirements import Requires
+from engine.segments import Segmentation
+from engine.sessions import session_partial, session_strategy
+from engine.specs import spec
+
+# Sessions bucketed by number of events rather than seconds
+SESSION_EVENTS = Segmentation(
+    [('Short', '<', 5), ('Long', '>', 15)], default='Medium', labels=['Short', 'Medium', 'Long']
+)
+
 # 1. Storyline Drop-offs
-def storyline_dropoffs(data):
-    narrative_data = data[data['event_type'] == 'progression']
-    dropoff_data = narrative_data.groupby('progression_02').size().reset_index(name='count')
+@spec('progression_02', event_type='progression')
+def storyline_dropoffs(counts):
+    dropoff_data = top_n(counts.reset_index(name='count'))
 
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -29,9 +40,9 @@ def storyline_dropoffs(data):
     return fig, explanation, recommendation
 
 # 2. Resource Usage Analysis
-def resource_usage(data):
-    resource_data = data[data['event_type'] == 'resource']
-    usage_data = resource_data.groupby('currency').agg({'amount': 'sum'}).reset_index()
+@spec('currency', event_type='resource', aggs={'amount': ('amount', 'sum')})
+def resource_usage(amounts):
+    usage_data = amounts.reset_index()
 
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -56,18 +67,12 @@ def resource_usage(data):
     return fig, explanation, recommendation
 
 # 3. Retention Strategy
-def retention_strategy(data):
-    # Group sessions and calculate the number of events per session
-    session_data = data.groupby('session_id').size().reset_index(name='events_per_session')
-    
-    # Categorize sessions based on the number of events
-    session_data['category'] = session_data['events_per_session'].apply(
-        lambda x: 'Short' if x < 5 else 'Long' if x > 15 else 'Medium'
-    )
+@session_strategy
+def retention_strategy(sessions):
+    session_data = sessions['events'].reset_index(name='events_per_session')
     
-    # Count the occurrences of each category
-    category_counts = session_data['category'].value_counts().reset_index()
-    category_counts.columns = ['category', 'count']  # Rename columns for clarity
+    # Categorize sessions based on the number of events and count each category
+    category_counts = SESSION_EVENTS.counts(session_data['events_per_session'])
 
     # Create the Pie chart
     fig = go.Figure()
@@ -104,3 +109,19 @@ def vertical_funcs():
         "Resource Usage": resource_usage,
         "Retention Strategy": retention_strategy
     }
+
+
+def vertical_requirements():
+    return {
+        "Storyline Drop-offs": Requires(['progression_02'], ['progression']),
+        "Resource Usage": Requires(['currency', 'amount'], ['resource']),
+        "Retention Strategy": Requires(['session_id', 'client_ts'])
+    }
+
+
+def vertical_partials():
+    return {
+        "Storyline Drop-offs": storyline_dropoffs.spec.partial(),
+        "Resource Usage": resource_usage.spec.partial(),
+        "Retention Strategy": session_partial(retention_strategy)
+    }
@@ -1,12 +1,18 @@
-import pandas as pd
 import plotly.graph_objects as go
 
+from engine.requirements import Requires
+from engine.segments import SESSION_LENGTH
+from engine.sessions import session_partial, session_strategy
+from engine.specs import spec
+
 # Session Timing Patterns
-def session_timing_patterns(data):
+@spec('session_id', aggs={'sum': ('client_ts', 'sum'), 'count': ('client_ts', 'count')})
+def session_timing_patterns(sums):
     # Calculate average playtime per session
-    timing_data = data.groupby('session_id').agg({'client_ts': 'mean'}).reset_index()
-    timing_data['hour'] = pd.to_datetime(timing_data['client_ts'], unit='s').dt.hour
-    hourly_counts = timing_data['hour'].value_counts().sort_index().reset_index()
+    timing_data = (sums['sum'] / sums['count']).reset_index(name='client_ts')
+    # Hour of the day (UTC) of the mean timestamp, as in engine.events.calendar
+    hours = (timing_data['client_ts'].dropna() // 3600 % 24).astype('int32').rename('hour')
+    hourly_counts = hours.value_counts().sort_index().reset_index()
     hourly_counts.columns = ['hour', 'count']
 
     fig = go.Figure()
@@ -32,9 +38,9 @@ def session_timing_patterns(data):
     return fig, explanation, recommendation
 
 # Ad Interaction Behavior
-def ad_interaction_behavior(data):
-    ad_data = data[data['event_type'] == 'ad']
-    interaction_data = ad_data.groupby('ad_placement').size().reset_index(name='count')
+@spec('ad_placement', event_type='ad')
+def ad_interaction_behavior(counts):
+    interaction_data = counts.reset_index(name='count')
 
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -59,9 +65,9 @@ def ad_interaction_behavior(data):
     return fig, explanation, recommendation
 
 # Resource Usage
-def resource_usage(data):
-    resource_data = data[data['event_type'] == 'resource']
-    resource_counts = resource_data.groupby('currency').size().reset_index(name='count')
+@spec('currency', event_type='resource')
+def resource_usage(counts):
+    resource_counts = counts.reset_index(name='count')
 
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -86,15 +92,10 @@ def resource_usage(data):
     return fig, explanation, recommendation
 
 # Retention Strategy
-def retention_strategy(data):
-    # Calculate session lengths using session start and end timestamps
-    session_times = data.pivot_table(index='session_id', columns='event_type', values='client_ts', aggfunc='first')
-    session_times['session_length'] = session_times['session_end'] - session_times['session_start']
-    session_times['category'] = session_times['session_length'].apply(
-        lambda x: 'Short' if x < 300 else 'Long' if x > 1200 else 'Medium'
-    )
-    category_counts = session_times['category'].value_counts().reset_index()
-    category_counts.columns = ['category', 'count']
+@session_strategy
+def retention_strategy(sessions):
+    # Session lengths from the session start and end timestamps; sessions missing either count as Medium
+    category_counts = SESSION_LENGTH.counts(sessions['duration'])
 
     fig = go.Figure()
     fig.add_trace(go.Pie(
@@ -125,3 +126,21 @@ def vertical_funcs():
         "Resource Usage": resource_usage,
         "Retention Strategy": retention_strategy
     }
+
+
+def vertical_requirements():
+    return {
+        "Session Timing Patterns": Requires(['session_id', 'client_ts']),
+        "Ad Interaction Behavior": Requires(['ad_placement'], ['ad']),
+        "Resource Usage": Requires(['currency'], ['resource']),
+        "Retention Strategy": Requires(['session_id', 'client_ts'], ['session_start', 'session_end'])
+    }
+
+
+def vertical_partials():
+    return {
+        "Session Timing Patterns": session_timing_patterns.spec.partial(),
+        "Ad Interaction Behavior": ad_interaction_behavior.spec.partial(),
+        "Resource Usage": resource_usage.spec.partial(),
+        "Retention Strategy": session_partial(retention_strategy)
+    }
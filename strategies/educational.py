@@ -1,10 +1,15 @@
-import pandas as pd
 import plotly.graph_objects as go
 
+from engine.figures import top_n
+from engine.requirements import Requires
+from engine.segments import SESSION_LENGTH
+from engine.sessions import session_strategy
+from engine.specs import spec
+
 # Challenge Completion Rates
-def challenge_completion_rates(data):
-    challenge_data = data[data['event_type'] == 'challenge']
-    completion_data = challenge_data.groupby('progression_01').size().reset_index(name='count')
+@spec('progression_01', event_type='challenge')
+def challenge_completion_rates(counts):
+    completion_data = counts.reset_index(name='count')
 
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -29,8 +34,9 @@ def challenge_completion_rates(data):
     return fig, explanation, recommendation
 
 # Session Patterns by Age Group
-def session_patterns_by_age_group(data):
-    age_group_data = data.groupby(['age_group', 'session_id']).size().reset_index(name='count')
+@spec(['age_group', 'session_id'])
+def session_patterns_by_age_group(counts):
+    age_group_data = counts.reset_index(name='count')
     age_group_counts = age_group_data.groupby('age_group')['count'].sum().reset_index()
 
     fig = go.Figure()
@@ -56,9 +62,9 @@ def session_patterns_by_age_group(data):
     return fig, explanation, recommendation
 
 # Topic Popularity
-def topic_popularity(data):
-    topic_data = data[data['event_type'] == 'topic']
-    topic_counts = topic_data.groupby('progression_02').size().reset_index(name='count')
+@spec('progression_02', event_type='topic')
+def topic_popularity(counts):
+    topic_counts = top_n(counts.reset_index(name='count'))
 
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -83,14 +89,9 @@ def topic_popularity(data):
     return fig, explanation, recommendation
 
 # Retention Strategy
-def retention_strategy(data):
-    session_times = data.pivot_table(index='session_id', columns='event_type', values='client_ts', aggfunc='first')
-    session_times['session_length'] = session_times['session_end'] - session_times['session_start']
-    session_times['category'] = session_times['session_length'].apply(
-        lambda x: 'Short' if x < 300 else 'Long' if x > 1200 else 'Medium'
-    )
-    category_counts = session_times['category'].value_counts().reset_index()
-    category_counts.columns = ['category', 'count']
+@session_strategy
+def retention_strategy(sessions):
+    category_counts = SESSION_LENGTH.counts(sessions['duration'])
 
     fig = go.Figure()
     fig.add_trace(go.Pie(
@@ -119,3 +120,12 @@ def vertical_funcs():
         "Topic Popularity": topic_popularity,
         "Retention Strategy": retention_strategy
     }
+
+
+def vertical_requirements():
+    return {
+        "Challenge Completion Rates": Requires(['progression_01'], ['challenge']),
+        "Session Patterns by Age Group": Requires(['age_group', 'session_id']),
+        "Topic Popularity": Requires(['progression_02'], ['topic']),
+        "Retention Strategy": Requires(['session_id', 'client_ts'], ['session_start', 'session_end'])
+    }
@@ -1,9 +1,15 @@
 import pandas as pd
 import plotly.graph_objects as go
 
+from engine.figures import histogram
+from engine.requirements import Requires
+from engine.segments import SESSION_LENGTH
+from engine.specs import spec
+
 # Skill vs Progression Analysis
-def skill_vs_progression_analysis(data):
-    skill_data = data.groupby('progression_01').agg({'score': 'mean'}).reset_index()
+@spec('progression_01', aggs={'score': ('score', 'mean')})
+def skill_vs_progression_analysis(scores):
+    skill_data = scores.reset_index()
 
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -28,14 +34,14 @@ def skill_vs_progression_analysis(data):
     return fig, explanation, recommendation
 
 # Social Dynamics
-def social_dynamics(data):
-    social_data = data[data['event_type'] == 'guild_interaction']
-    participation = social_data.groupby('session_id').size().reset_index(name='interactions')
+@spec('session_id', event_type='guild_interaction')
+def social_dynamics(counts):
+    participation = counts.reset_index(name='interactions')
 
     fig = go.Figure()
-    fig.add_trace(go.Histogram(
-        x=participation['interactions'],
-        nbinsx=20,
+    fig.add_trace(histogram(
+        participation['interactions'],
+        nbins=20,
         marker_color='rgb(60, 179, 113)'
     ))
 
@@ -53,9 +59,9 @@ def social_dynamics(data):
     return fig, explanation, recommendation
 
 # Transaction Analysis
-def transaction_analysis(data):
-    transaction_data = data[data['event_type'] == 'business']
-    transaction_counts = transaction_data.groupby('item_type').size().reset_index(name='count')
+@spec('item_type', event_type='business')
+def transaction_analysis(counts):
+    transaction_counts = counts.reset_index(name='count')
 
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -80,13 +86,10 @@ def transaction_analysis(data):
     return fig, explanation, recommendation
 
 # Retention Strategy
-def retention_strategy(data):
-    session_data = data.groupby('session_id').agg({'session_length': 'sum'}).reset_index()
-    session_data['category'] = session_data['session_length'].apply(
-        lambda x: 'Short' if x < 300 else 'Long' if x > 1200 else 'Medium'
-    )
-    category_counts = session_data['category'].value_counts().reset_index()
-    category_counts.columns = ['category', 'count']
+@spec('session_id', aggs={'session_length': ('session_length', 'sum')})
+def retention_strategy(totals):
+    session_data = totals.reset_index()
+    category_counts = SESSION_LENGTH.counts(session_data['session_length'])
 
     fig = go.Figure()
     fig.add_trace(go.Pie(
@@ -115,3 +118,12 @@ def vertical_funcs():
         "Transaction Analysis": transaction_analysis,
         "Retention Strategy": retention_strategy
     }
+
+
+def vertical_requirements():
+    return {
+        "Skill vs Progression Analysis": Requires(['progression_01', 'score']),
+        "Social Dynamics": Requires(['session_id'], ['guild_interaction']),
+        "Transaction Analysis": Requires(['item_type'], ['business']),
+        "Retention Strategy": Requires(['session_id', 'session_length'])
+    }
@@ -1,10 +1,15 @@
 import pandas as pd 
 import plotly.graph_objects as go
 
+from engine.backends import values
+from engine.requirements import Requires
+from engine.segments import SESSION_LENGTH
+from engine.specs import spec
+
 # 1. Ad Viewing Drop-offs
-def analyze_ad_viewing_dropoffs(data):
-    ad_data = data[data['event_type'] == 'ad']
-    dropoff_data = ad_data.groupby(['ad_placement', 'ad_action']).size().reset_index(name='count')
+@spec(['ad_placement', 'ad_action'], event_type='ad')
+def analyze_ad_viewing_dropoffs(counts):
+    dropoff_data = counts.reset_index(name='count')
     
     fig = go.Figure()
     for action in dropoff_data['ad_action'].unique():
@@ -31,11 +36,7 @@ def analyze_ad_viewing_dropoffs(data):
 
 # 2. Session Length Patterns
 def analyze_session_length_patterns(data):
-    session_end_data = data[data['event_type'] == 'session_end']
-    session_end_data['length_category'] = session_end_data['session_length'].apply(
-        lambda x: 'Short' if x < 300 else 'Long' if x > 1200 else 'Medium'
-    )
-    length_patterns = session_end_data.groupby('length_category').size().reset_index(name='count')
+    length_patterns = SESSION_LENGTH.counts(values(data, 'session_length', 'session_end'), name='length_category')
 
     fig = go.Figure()
     fig.add_trace(go.Pie(
@@ -54,9 +55,9 @@ def analyze_session_length_patterns(data):
     return fig, explanation, recommendation
 
 # 3. Content Popularity
-def analyze_content_popularity(data):
-    progression_data = data[data['event_type'] == 'progression']
-    content_popularity = progression_data.groupby('ad_placement').size().reset_index(name='count')
+@spec('ad_placement', event_type='progression')
+def analyze_content_popularity(counts):
+    content_popularity = counts.reset_index(name='count')
 
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -78,16 +79,16 @@ def analyze_content_popularity(data):
     return fig, explanation, recommendation
 
 # 4. Retention Strategy Insights
-def retention_strategy_insights(data):
-    ad_data = data[data['event_type'] == 'ad']
-    most_popular_ad = ad_data['ad_placement'].value_counts().idxmax()
+@spec('ad_placement', event_type='ad')
+def retention_strategy_insights(placement_counts):
+    most_popular_ad = placement_counts.idxmax()
 
     fig = go.Figure()
     fig.add_trace(go.Indicator(
         mode="number+delta",
-        value=ad_data['ad_placement'].value_counts().max(),
+        value=placement_counts.max(),
         title={"text": f"Most Popular Ad Placement: {most_popular_ad}"},
-        delta={"reference": ad_data['ad_placement'].value_counts().mean()},
+        delta={"reference": placement_counts.mean()},
     ))
 
     fig.update_layout(
@@ -103,4 +104,12 @@ def vertical_funcs():
             "Session Length Patterns": analyze_session_length_patterns, 
             "Content Popularity": analyze_content_popularity,
             "Retention Strategy": retention_strategy_insights}
-    
\ No newline at end of file
+
+
+def vertical_requirements():
+    return {
+        "Ad Viewing Drop-offs": Requires(['ad_placement', 'ad_action'], ['ad']),
+        "Session Length Patterns": Requires(['session_length'], ['session_end']),
+        "Content Popularity": Requires(['ad_placement'], ['progression']),
+        "Retention Strategy": Requires(['ad_placement'], ['ad'])
+    }
@@ -1,9 +1,18 @@
 import pandas as pd
 import plotly.graph_objects as go
 
+from engine.requirements import Requires
+from engine.segments import SESSION_LENGTH, Segmentation
+from engine.specs import spec
+
+ACTIVITY_LEVELS = Segmentation(
+    [('High', '>', 10), ('Medium', '>', 5)], default='Low', labels=['Low', 'Medium', 'High']
+)
+
 # Progression Bottlenecks
-def progression_bottlenecks(data):
-    bottleneck_data = data.groupby('progression_01').size().reset_index(name='count')
+@spec('progression_01')
+def progression_bottlenecks(counts):
+    bottleneck_data = counts.reset_index(name='count')
 
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -28,13 +37,10 @@ def progression_bottlenecks(data):
     return fig, explanation, recommendation
 
 # User Segmentation
-def user_segmentation(data):
-    segmentation_data = data.groupby('user_id').size().reset_index(name='sessions')
-    segmentation_data['activity_level'] = segmentation_data['sessions'].apply(
-        lambda x: 'High' if x > 10 else 'Medium' if x > 5 else 'Low'
-    )
-    activity_counts = segmentation_data['activity_level'].value_counts().reset_index()
-    activity_counts.columns = ['activity_level', 'count']  # Rename columns for clarity
+@spec('user_id')
+def user_segmentation(counts):
+    segmentation_data = counts.reset_index(name='sessions')
+    activity_counts = ACTIVITY_LEVELS.counts(segmentation_data['sessions'], name='activity_level')
 
     fig = go.Figure()
     fig.add_trace(go.Pie(
@@ -57,8 +63,9 @@ def user_segmentation(data):
     return fig, explanation, recommendation
 
 # Transaction Trends
-def transaction_trends(data):
-    transaction_data = data.groupby('item_type').size().reset_index(name='count')
+@spec('item_type')
+def transaction_trends(counts):
+    transaction_data = counts.reset_index(name='count')
 
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -83,13 +90,10 @@ def transaction_trends(data):
     return fig, explanation, recommendation
 
 # Retention Strategy
-def retention_strategy(data):
-    session_data = data.groupby('session_id').agg({'session_length': 'sum'}).reset_index()
-    session_data['category'] = session_data['session_length'].apply(
-        lambda x: 'Short' if x < 300 else 'Long' if x > 1200 else 'Medium'
-    )
-    category_counts = session_data['category'].value_counts().reset_index()
-    category_counts.columns = ['category', 'count']
+@spec('session_id', aggs={'session_length': ('session_length', 'sum')})
+def retention_strategy(totals):
+    session_data = totals.reset_index()
+    category_counts = SESSION_LENGTH.counts(session_data['session_length'])
 
     fig = go.Figure()
     fig.add_trace(go.Pie(
@@ -118,3 +122,12 @@ def vertical_funcs():
         "Transaction Trends": transaction_trends,
         "Retention Strategy": retention_strategy
     }
+
+
+def vertical_requirements():
+    return {
+        "Progression Bottlenecks": Requires(['progression_01']),
+        "User Segmentation": Requires(['user_id']),
+        "Transaction Trends": Requires(['item_type']),
+        "Retention Strategy": Requires(['session_id', 'session_length'])
+    }
@@ -1,10 +1,16 @@
 import pandas as pd
 import plotly.graph_objects as go
 
+from engine.figures import top_n
+from engine.requirements import Requires
+from engine.segments import SESSION_LENGTH
+from engine.sessions import session_strategy
+from engine.specs import spec
+
 # Level Completion Trends
-def level_completion_trends(data):
-    level_data = data[data['event_type'] == 'progression']
-    completion_data = level_data.groupby('progression_02').size().reset_index(name='count')
+@spec('progression_02', event_type='progression')
+def level_completion_trends(counts):
+    completion_data = top_n(counts.reset_index(name='count'))
 
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -29,9 +35,9 @@ def level_completion_trends(data):
     return fig, explanation, recommendation
 
 # Hint Usage
-def hint_usage(data):
-    hint_data = data[data['event_type'] == 'hint']
-    hint_counts = hint_data.groupby('progression_02').size().reset_index(name='count')
+@spec('progression_02', event_type='hint')
+def hint_usage(counts):
+    hint_counts = top_n(counts.reset_index(name='count'))
 
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -56,15 +62,11 @@ def hint_usage(data):
     return fig, explanation, recommendation
 
 # Session Gaps
-def session_gaps(data):
-    session_data = data.groupby('session_id').agg({'client_ts': ['min', 'max']}).reset_index()
-    session_data.columns = ['session_id', 'min_ts', 'max_ts']  # Rename columns for clarity
-    session_data['gap'] = session_data['max_ts'] - session_data['min_ts']
-    session_data['gap_category'] = session_data['gap'].apply(
-        lambda x: 'Short' if x < 300 else 'Long' if x > 1200 else 'Medium'
-    )
-    gap_counts = session_data['gap_category'].value_counts().reset_index()
-    gap_counts.columns = ['category', 'count']  # Rename columns explicitly
+@session_strategy
+def session_gaps(sessions):
+    session_data = sessions.reset_index()
+    session_data['gap'] = session_data['last_ts'] - session_data['first_ts']
+    gap_counts = SESSION_LENGTH.counts(session_data['gap'])
 
     fig = go.Figure()
     fig.add_trace(go.Pie(
@@ -90,13 +92,10 @@ def session_gaps(data):
 
 
 # Retention Strategy
-def retention_strategy(data):
-    retention_data = data.groupby('session_id').agg({'session_length': 'sum'}).reset_index()
-    retention_data['category'] = retention_data['session_length'].apply(
-        lambda x: 'Short' if x < 300 else 'Long' if x > 1200 else 'Medium'
-    )
-    category_counts = retention_data['category'].value_counts().reset_index()
-    category_counts.columns = ['category', 'count']
+@spec('session_id', aggs={'session_length': ('session_length', 'sum')})
+def retention_strategy(totals):
+    retention_data = totals.reset_index()
+    category_counts = SESSION_LENGTH.counts(retention_data['session_length'])
 
     fig = go.Figure()
     fig.add_trace(go.Pie(
@@ -125,3 +124,12 @@ def vertical_funcs():
         "Session Gaps": session_gaps,
         "Retention Strategy": retention_strategy
     }
+
+
+def vertical_requirements():
+    return {
+        "Level Completion Trends": Requires(['progression_02'], ['progression']),
+        "Hint Usage": Requires(['progression_02'], ['hint']),
+        "Session Gaps": Requires(['session_id', 'client_ts']),
+        "Retention Strategy": Requires(['session_id', 'session_length'])
+    }
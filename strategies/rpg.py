@@ -1,10 +1,16 @@
 import pandas as pd
 import plotly.graph_objects as go
 
+from engine.figures import top_n
+from engine.requirements import Requires
+from engine.segments import SESSION_LENGTH
+from engine.sessions import session_partial, session_strategy
+from engine.specs import spec
+
 # Quest Completion Rates
-def quest_completion_rates(data):
-    quest_data = data[data['event_type'] == 'progression']
-    quest_completion = quest_data.groupby('progression_02').size().reset_index(name='count')
+@spec('progression_02', event_type='progression')
+def quest_completion_rates(counts):
+    quest_completion = top_n(counts.reset_index(name='count'))
 
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -32,9 +38,9 @@ def quest_completion_rates(data):
     return fig, explanation, recommendation
 
 # Resource Balancing
-def resource_balancing(data):
-    resource_data = data[data['event_type'] == 'resource']
-    resource_usage = resource_data.groupby('currency').size().reset_index(name='count')
+@spec('currency', event_type='resource')
+def resource_balancing(counts):
+    resource_usage = counts.reset_index(name='count')
 
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -62,9 +68,9 @@ def resource_balancing(data):
     return fig, explanation, recommendation
 
 # Progression Pathways
-def progression_pathways(data):
-    progression_data = data[data['event_type'] == 'progression']
-    pathway_counts = progression_data.groupby('progression_01').size().reset_index(name='count')
+@spec('progression_01', event_type='progression')
+def progression_pathways(counts):
+    pathway_counts = counts.reset_index(name='count')
 
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -93,13 +99,10 @@ def progression_pathways(data):
 
 # Retention Strategy
 # Retention Strategy
-def retention_strategy(data):
-    retention_data = data.groupby('session_id').size().reset_index(name='session_length')
-    retention_data['category'] = retention_data['session_length'].apply(
-        lambda x: 'Short' if x < 300 else 'Long' if x > 1200 else 'Medium'
-    )
-    category_counts = retention_data['category'].value_counts().reset_index()
-    category_counts.columns = ['category', 'count']  # Rename columns explicitly
+@session_strategy
+def retention_strategy(sessions):
+    retention_data = sessions['events'].reset_index(name='session_length')
+    category_counts = SESSION_LENGTH.counts(retention_data['session_length'])
 
     fig = go.Figure()
     fig.add_trace(go.Pie(
@@ -125,3 +128,21 @@ def vertical_funcs():
         "Progression Pathways": progression_pathways,
         "Retention Strategy": retention_strategy
     }
+
+
+def vertical_requirements():
+    return {
+        "Quest Completion Rates": Requires(['progression_02'], ['progression']),
+        "Resource Balancing": Requires(['currency'], ['resource']),
+        "Progression Pathways": Requires(['progression_01'], ['progression']),
+        "Retention Strategy": Requires(['session_id', 'client_ts'])
+    }
+
+
+def vertical_partials():
+    return {
+        "Quest Completion Rates": quest_completion_rates.spec.partial(),
+        "Resource Balancing": resource_balancing.spec.partial(),
+        "Progression Pathways": progression_pathways.spec.partial(),
+        "Retention Strategy": session_partial(retention_strategy)
+    }
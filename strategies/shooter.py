@@ -1,18 +1,22 @@
 import pandas as pd
 import plotly.graph_objects as go
 
-# Kill-to-Death Ratios
-def kill_to_death_ratios(data):
-    if "kills" not in data.columns or "deaths" not in data.columns:
-        raise KeyError("Columns 'kills' and 'deaths' are missing.")
+from engine.figures import histogram, top_n
+from engine.requirements import Requires
+from engine.segments import SESSION_LENGTH
+from engine.sessions import session_strategy
+from engine.specs import spec
 
-    kd_data = data.groupby('user_id').agg({'kills': 'sum', 'deaths': 'sum'}).reset_index()
+# Kill-to-Death Ratios
+@spec('user_id', aggs={'kills': ('kills', 'sum'), 'deaths': ('deaths', 'sum')})
+def kill_to_death_ratios(totals):
+    kd_data = totals.reset_index()
     kd_data['kd_ratio'] = kd_data['kills'] / (kd_data['deaths'] + 1)
 
     fig = go.Figure()
-    fig.add_trace(go.Histogram(
-        x=kd_data['kd_ratio'],
-        nbinsx=20,
+    fig.add_trace(histogram(
+        kd_data['kd_ratio'],
+        nbins=20,
         marker_color='rgb(99, 110, 250)'
     ))
 
@@ -27,9 +31,9 @@ def kill_to_death_ratios(data):
     return fig, explanation, recommendation
 
 # Weapon Usage Analysis
-def weapon_usage_analysis(data):
-    weapon_data = data[data['event_type'] == 'combat']
-    weapon_counts = weapon_data.groupby('customization_id').size().reset_index(name='count')
+@spec('customization_id', event_type='combat')
+def weapon_usage_analysis(counts):
+    weapon_counts = top_n(counts.reset_index(name='count'))
 
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -51,9 +55,9 @@ def weapon_usage_analysis(data):
     return fig, explanation, recommendation
 
 # Map Engagement
-def map_engagement(data):
-    map_data = data[data['event_type'] == 'progression']
-    map_counts = map_data.groupby('progression_01').size().reset_index(name='count')
+@spec('progression_01', event_type='progression')
+def map_engagement(counts):
+    map_counts = counts.reset_index(name='count')
 
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -75,13 +79,10 @@ def map_engagement(data):
     return fig, explanation, recommendation
 
 # Retention Strategy
-def retention_strategy(data):
-    retention_data = data.groupby('session_id').size().reset_index(name='session_length')
-    retention_data['category'] = retention_data['session_length'].apply(
-        lambda x: 'Short' if x < 300 else 'Long' if x > 1200 else 'Medium'
-    )
-    category_counts = retention_data['category'].value_counts().reset_index()
-    category_counts.columns = ['category', 'count']
+@session_strategy
+def retention_strategy(sessions):
+    retention_data = sessions['events'].reset_index(name='session_length')
+    category_counts = SESSION_LENGTH.counts(retention_data['session_length'])
 
     fig = go.Figure()
     fig.add_trace(go.Pie(
@@ -107,3 +108,12 @@ def vertical_funcs():
         "Map Engagement": map_engagement,
         "Retention Strategy": retention_strategy
     }
+
+
+def vertical_requirements():
+    return {
+        "Kill-to-Death Ratios": Requires(['user_id', 'kills', 'deaths']),
+        "Weapon Usage Analysis": Requires(['customization_id'], ['combat']),
+        "Map Engagement": Requires(['progression_01'], ['progression']),
+        "Retention Strategy": Requires(['session_id', 'client_ts'])
+    }
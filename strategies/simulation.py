@@ -1,10 +1,16 @@
 import pandas as pd
 import plotly.graph_objects as go
 
+from engine.figures import top_n
+from engine.requirements import Requires
+from engine.segments import SESSION_LENGTH
+from engine.sessions import session_strategy
+from engine.specs import spec
+
 # Build Completion Rates
-def build_completion_rates(data):
-    build_data = data[data['event_type'] == 'progression']
-    build_counts = build_data.groupby('progression_02').size().reset_index(name='count')
+@spec('progression_02', event_type='progression')
+def build_completion_rates(counts):
+    build_counts = top_n(counts.reset_index(name='count'))
 
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -26,9 +32,9 @@ def build_completion_rates(data):
     return fig, explanation, recommendation
 
 # Resource Consumption Trends
-def resource_consumption_trends(data):
-    resource_data = data[data['event_type'] == 'resource']
-    resource_usage = resource_data.groupby('currency').size().reset_index(name='count')
+@spec('currency', event_type='resource')
+def resource_consumption_trends(counts):
+    resource_usage = counts.reset_index(name='count')
 
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -50,13 +56,10 @@ def resource_consumption_trends(data):
     return fig, explanation, recommendation
 
 # Session Diversity
-def session_diversity(data):
-    session_data = data.groupby('session_id').size().reset_index(name='session_length')
-    session_data['category'] = session_data['session_length'].apply(
-        lambda x: 'Short' if x < 300 else 'Long' if x > 1200 else 'Medium'
-    )
-    category_counts = session_data['category'].value_counts().reset_index()
-    category_counts.columns = ['category', 'count']  # Rename columns for clarity
+@spec('session_id')
+def session_diversity(counts):
+    session_data = counts.reset_index(name='session_length')
+    category_counts = SESSION_LENGTH.counts(session_data['session_length'])
 
     fig = go.Figure()
     fig.add_trace(go.Pie(
@@ -80,13 +83,10 @@ def session_diversity(data):
 
 
 # Retention Strategy
-def retention_strategy(data):
-    retention_data = data.groupby('session_id').size().reset_index(name='session_length')
-    retention_data['category'] = retention_data['session_length'].apply(
-        lambda x: 'Short' if x < 300 else 'Long' if x > 1200 else 'Medium'
-    )
-    category_counts = retention_data['category'].value_counts().reset_index()
-    category_counts.columns = ['category', 'count']  # Rename columns for clarity
+@session_strategy
+def retention_strategy(sessions):
+    retention_data = sessions['events'].reset_index(name='session_length')
+    category_counts = SESSION_LENGTH.counts(retention_data['session_length'])
 
     fig = go.Figure()
     fig.add_trace(go.Pie(
@@ -118,3 +118,12 @@ def vertical_funcs():
         "Session Diversity": session_diversity,
         "Retention Strategy": retention_strategy
     }
+
+
+def vertical_requirements():
+    return {
+        "Build Completion Rates": Requires(['progression_02'], ['progression']),
+        "Resource Consumption Trends": Requires(['currency'], ['resource']),
+        "Session Diversity": Requires(['session_id']),
+        "Retention Strategy": Requires(['session_id', 'client_ts'])
+    }
@@ -1,13 +1,15 @@
 import pandas as pd
 import plotly.graph_objects as go
 
-# Match Participation Trends
-def match_participation_trends(data):
-    if "match_phase" not in data.columns:
-        raise KeyError("Column 'match_phase' is missing. Ensure the dataset includes this column.")
+from engine.requirements import Requires
+from engine.segments import SESSION_LENGTH
+from engine.sessions import session_strategy
+from engine.specs import spec
 
-    match_data = data[data['event_type'] == 'progression']
-    dropoff_data = match_data.groupby('match_phase').size().reset_index(name='count')
+# Match Participation Trends
+@spec('match_phase', event_type='progression')
+def match_participation_trends(counts):
+    dropoff_data = counts.reset_index(name='count')
 
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -29,9 +31,9 @@ def match_participation_trends(data):
     return fig, explanation, recommendation
 
 # In-game Tournaments
-def in_game_tournaments(data):
-    tournament_data = data[data['event_type'] == 'progression']
-    tournament_counts = tournament_data.groupby('match_phase').size().reset_index(name='count')
+@spec('match_phase', event_type='progression')
+def in_game_tournaments(counts):
+    tournament_counts = counts.reset_index(name='count')
 
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -53,9 +55,9 @@ def in_game_tournaments(data):
     return fig, explanation, recommendation
 
 # Customization Usage
-def customization_usage(data):
-    customization_data = data[data['event_type'] == 'customization']
-    customization_counts = customization_data.groupby('customization_type').size().reset_index(name='count')
+@spec('customization_type', event_type='customization')
+def customization_usage(counts):
+    customization_counts = counts.reset_index(name='count')
 
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -83,13 +85,10 @@ def customization_usage(data):
     return fig, explanation, recommendation
 
 # Retention Strategy
-def retention_strategy(data):
-    retention_data = data.groupby('session_id').size().reset_index(name='session_length')
-    retention_data['category'] = retention_data['session_length'].apply(
-        lambda x: 'Short' if x < 300 else 'Long' if x > 1200 else 'Medium'
-    )
-    category_counts = retention_data['category'].value_counts().reset_index()
-    category_counts.columns = ['category', 'count']  # Rename columns for clarity
+@session_strategy
+def retention_strategy(sessions):
+    retention_data = sessions['events'].reset_index(name='session_length')
+    category_counts = SESSION_LENGTH.counts(retention_data['session_length'])
 
     fig = go.Figure()
     fig.add_trace(go.Pie(
@@ -115,3 +114,12 @@ def vertical_funcs():
         "Customization Usage": customization_usage,
         "Retention Strategy": retention_strategy
     }
+
+
+def vertical_requirements():
+    return {
+        "Match Participation Trends": Requires(['match_phase'], ['progression']),
+        "In-game Tournaments": Requires(['match_phase'], ['progression']),
+        "Customization Usage": Requires(['customization_type'], ['customization']),
+        "Retention Strategy": Requires(['session_id', 'client_ts'])
+    }
@@ -1,10 +1,16 @@
 import pandas as pd
 import plotly.graph_objects as go
 
+from engine.figures import histogram, top_n
+from engine.requirements import Requires
+from engine.segments import SESSION_LENGTH
+from engine.sessions import session_strategy
+from engine.specs import spec
+
 # Battle Success Rates
-def battle_success_rates(data):
-    battle_data = data[data['event_type'] == 'progression']
-    success_data = battle_data.groupby('progression_02').size().reset_index(name='count')
+@spec('progression_02', event_type='progression')
+def battle_success_rates(counts):
+    success_data = top_n(counts.reset_index(name='count'))
 
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -26,9 +32,9 @@ def battle_success_rates(data):
     return fig, explanation, recommendation
 
 # Resource Scarcity Impact
-def resource_scarcity_impact(data):
-    resource_data = data[data['event_type'] == 'resource']
-    scarcity_data = resource_data.groupby('currency').size().reset_index(name='count')
+@spec('currency', event_type='resource')
+def resource_scarcity_impact(counts):
+    scarcity_data = counts.reset_index(name='count')
 
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -50,13 +56,14 @@ def resource_scarcity_impact(data):
     return fig, explanation, recommendation
 
 # Group Play Dynamics
-def group_play_dynamics(data):
-    session_counts = data.groupby('session_id').size().reset_index(name='group_activity')
+@spec('session_id')
+def group_play_dynamics(counts):
+    session_counts = counts.reset_index(name='group_activity')
 
     fig = go.Figure()
-    fig.add_trace(go.Histogram(
-        x=session_counts['group_activity'],
-        nbinsx=20,
+    fig.add_trace(histogram(
+        session_counts['group_activity'],
+        nbins=20,
         marker_color='rgb(255, 127, 80)'
     ))
 
@@ -71,13 +78,10 @@ def group_play_dynamics(data):
     return fig, explanation, recommendation
 
 # Retention Strategy
-def retention_strategy(data):
-    retention_data = data.groupby('session_id').size().reset_index(name='session_length')
-    retention_data['category'] = retention_data['session_length'].apply(
-        lambda x: 'Short' if x < 300 else 'Long' if x > 1200 else 'Medium'
-    )
-    category_counts = retention_data['category'].value_counts().reset_index()
-    category_counts.columns = ['category', 'count']  # Rename columns for clarity
+@session_strategy
+def retention_strategy(sessions):
+    retention_data = sessions['events'].reset_index(name='session_length')
+    category_counts = SESSION_LENGTH.counts(retention_data['session_length'])
 
     fig = go.Figure()
     fig.add_trace(go.Pie(
@@ -106,3 +110,12 @@ def vertical_funcs():
         "Group Play Dynamics": group_play_dynamics,
         "Retention Strategy": retention_strategy
     }
+
+
+def vertical_requirements():
+    return {
+        "Battle Success Rates": Requires(['progression_02'], ['progression']),
+        "Resource Scarcity Impact": Requires(['currency'], ['resource']),
+        "Group Play Dynamics": Requires(['session_id']),
+        "Retention Strategy": Requires(['session_id', 'client_ts'])
+    }
@@ -0,0 +1,20 @@
+import pytest
+
+from engine import generator
+from engine.cache import results as result_cache
+
+
+@pytest.fixture
+def dataset(tmp_path, monkeypatch):
+    # A small generated CSV export of a vertical; the mapped copies (engine.mapped)
+    # and cached results go to tmp_path, not the working directory
+    monkeypatch.setattr(result_cache, 'directory', str(tmp_path / 'cache'))
+
+    def write(vertical, rows=3000):
+        return generator.write_csv(str(tmp_path / ('%s.csv' % vertical)), vertical, rows)
+    return write
+
+
+def figures(results):
+    # Strategy results as comparable plotly JSON
+    return {name: result[0].to_json() for name, result in results.items()}
@@ -0,0 +1,18 @@
+import pytest
+
+from engine import planner, registry, sqlite
+
+from conftest import figures
+
+VERTICALS = ['casual', 'shooter', 'rpg', 'hypercasual']
+
+
+@pytest.mark.parametrize('vertical', VERTICALS)
+def test_duckdb_and_sqlite_match_pandas(dataset, monkeypatch, vertical):
+    monkeypatch.setenv('FORGE_MAPPED', '0')
+    path = dataset(vertical)
+    spec = registry.VERTICALS[vertical]
+    funcs = spec.funcs()
+    expected = figures(planner.run(spec.load(path)[0], funcs))
+    assert figures(planner.run(spec.load(path, 'duckdb')[0], funcs)) == expected
+    assert figures(planner.run(spec.load(sqlite.ingest(path))[0], funcs)) == expected
@@ -0,0 +1,47 @@
+import threading
+
+from engine.cache import ResultCache, _sources, source_hash
+from engine.sessions import session_strategy
+from engine.specs import spec
+
+
+def test_concurrent_put_same_key(tmp_path):
+    cache = ResultCache(directory=str(tmp_path))
+    key = ('dataset', 'module', 'func', 'digest')
+    errors = []
+
+    def put(value):
+        try:
+            for _ in range(50):
+                cache.put(key, value)
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=put, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert cache.get(key) in range(4)
+    # No temp files left behind
+    assert [p.name for p in tmp_path.rglob('*.tmp')] == []
+
+
+def _figure(counts):
+    return counts
+
+
+def test_key_covers_spec_query():
+    by_currency = spec('currency', event_type='resource')(_figure)
+    by_item = spec('item', event_type='resource')(_figure)
+    assert source_hash(by_currency) != source_hash(by_item)
+    assert source_hash(by_currency) == source_hash(spec('currency', event_type='resource')(_figure))
+    # The aggregation the spec runs is hashed with the figure
+    assert any('def aggregate_many' in source for source in _sources(by_currency, set()))
+
+
+def test_key_covers_session_table():
+    sources = _sources(session_strategy(_figure), set())
+    assert any('def _frame_table' in source for source in sources)
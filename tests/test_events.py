@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from engine.events import DAY, TIMESTAMP, index_events
+from engine.generator import frame
+
+
+def _check(view, expected, event_types):
+    # Same rows, and the same rows of every event type through the position index
+    pd.testing.assert_frame_equal(pd.DataFrame(view), expected)
+    for event_type in event_types:
+        pd.testing.assert_frame_equal(view.events(event_type), expected[expected['event_type'] == event_type])
+
+
+def test_between():
+    data = index_events(frame('casual', 3000))
+    rows = pd.DataFrame(data)
+    first = data[TIMESTAMP].iloc[0]
+    for start, end in [(first + DAY, first + 3 * DAY), (first - DAY, first), (0, 2 * first)]:
+        view = data.between(start, end)
+        _check(view, rows[(rows[TIMESTAMP] >= start) & (rows[TIMESTAMP] < end)], data.event_types())
+        assert view.event_types() == data.event_types()
+
+
+def test_subset():
+    data = index_events(frame('casual', 3000))
+    rows = pd.DataFrame(data)
+    for mask in [np.random.default_rng(0).random(len(data)) < 0.3, np.zeros(len(data), dtype=bool)]:
+        _check(data.subset(mask), rows[mask].reset_index(drop=True), data.event_types())
+    # Views of views
+    view = data.between(data[TIMESTAMP].iloc[100], data[TIMESTAMP].iloc[2000])
+    mask = (view['event_type'] == 'ad').to_numpy()
+    _check(view.subset(mask), pd.DataFrame(view)[mask].reset_index(drop=True), data.event_types())
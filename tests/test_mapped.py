@@ -0,0 +1,43 @@
+import mmap
+import os
+
+import numpy as np
+
+from engine import mapped, planner, registry
+
+from conftest import figures
+
+
+def _mapped(array):
+    while array is not None:
+        if isinstance(array, mmap.mmap):
+            return True
+        array = getattr(array, 'base', None)
+    return False
+
+
+def test_mapped_round_trip(dataset, monkeypatch):
+    path = dataset('casual')
+    spec = registry.VERTICALS['casual']
+    monkeypatch.setenv(mapped.MAPPED_ENV, '0')
+    expected, expected_footprint = spec.load(path, extra_columns=['user_id'])
+
+    monkeypatch.setenv(mapped.MAPPED_ENV, '1')
+    written = spec.load(path, extra_columns=['user_id'])
+    data, footprint = spec.load(path, extra_columns=['user_id'])
+    key = (spec.columns(['user_id']), spec.event_types(), spec.dtype_plan(['user_id']))
+    assert os.path.isfile(os.path.join(mapped.directory(path, key), mapped.MANIFEST))
+
+    for frame in (written[0], data):
+        # Column by column: assert_frame_equal tells memmaps from ndarrays
+        assert list(frame.columns) == list(expected.columns)
+        for name, column in expected.items():
+            assert frame[name].dtype == column.dtype
+            assert frame[name].equals(column)
+        np.testing.assert_array_equal(frame._event_order, expected._event_order)
+        assert frame._event_slices == expected._event_slices
+    assert footprint == expected_footprint
+    # Maps of the files, not copies
+    assert _mapped(data['client_ts'].to_numpy()) and _mapped(data['event_type'].array.codes)
+    assert not _mapped(expected['client_ts'].to_numpy())
+    assert figures(planner.run(data, spec.funcs())) == figures(planner.run(expected, spec.funcs()))
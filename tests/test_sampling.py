@@ -0,0 +1,19 @@
+import pandas as pd
+
+from engine import registry, sampling
+
+
+def test_pandas_and_duckdb_sample_the_same_users(dataset, monkeypatch):
+    monkeypatch.setenv('FORGE_MAPPED', '0')
+    path = dataset('shooter', rows=5000)
+    spec = registry.VERTICALS['shooter']
+    in_memory = sampling.sample(spec.load(path, extra_columns=['user_id'])[0], 0.2)
+    in_place = sampling.sample(spec.load(path, 'duckdb', extra_columns=['user_id'])[0], 0.2)
+
+    assert 0 < in_memory['user_id'].nunique() < 5000
+    columns = list(in_memory.columns)
+    rows = [
+        frame[columns].astype(str).sort_values(columns).reset_index(drop=True)
+        for frame in (in_memory, in_place)
+    ]
+    pd.testing.assert_frame_equal(*rows)
@@ -0,0 +1,20 @@
+import numpy as np
+import pandas as pd
+
+from engine.segments import SESSION_LENGTH
+
+
+def _chained(x):
+    return 'Short' if x < 300 else 'Long' if x > 1200 else 'Medium'
+
+
+def test_counts_match_value_counts():
+    # Bounds on both sides of each threshold; missing values get the default
+    values = pd.Series([0, 10, 299, 300, 301, 600, 1200, np.nan, 1201, 5000])
+    expected = values.map(_chained).value_counts().rename_axis('category').reset_index()
+    pd.testing.assert_frame_equal(SESSION_LENGTH.counts(values), expected)
+
+
+def test_counts_drop_empty_buckets():
+    counts = SESSION_LENGTH.counts(np.array([10.0, 20.0, 700.0]), name='length')
+    assert counts.to_dict('list') == {'length': ['Short', 'Medium'], 'count': [2, 1]}
@@ -0,0 +1,31 @@
+import pytest
+
+from engine.generator import frame
+from engine.store import DatasetStore
+
+
+@pytest.fixture
+def casual(tmp_path, monkeypatch):
+    monkeypatch.setenv('FORGE_MAPPED', '0')
+    path = tmp_path / 'casual.csv'
+    frame('casual', 2000).to_csv(path, index=False)
+    return str(path)
+
+
+def test_too_large_is_counted(casual):
+    store = DatasetStore(memory_budget=1)
+    store.get('casual', casual)
+    store.get('casual', casual)
+    [row] = store.stats()
+    assert (row['hits'], row['misses'], row['too_large'], row['resident_mb']) == (0, 2, 2, 0)
+
+
+def test_failed_load_releases_its_lock(casual, tmp_path):
+    broken = tmp_path / 'broken.csv'
+    broken.write_text('unrelated\n1\n')
+    store = DatasetStore()
+    with pytest.raises(Exception):
+        store.get('casual', str(broken))
+    assert store._loading == {}
+    store.get('casual', casual)
+    assert store.stats()[0]['misses'] == 2
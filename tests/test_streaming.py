@@ -0,0 +1,17 @@
+import pytest
+
+from engine import planner, registry, streaming
+
+from conftest import figures
+
+
+@pytest.mark.parametrize('vertical', ['casual', 'rpg', 'adventure'])
+def test_streamed_results_match_in_memory(dataset, monkeypatch, vertical):
+    monkeypatch.setenv('FORGE_MAPPED', '0')
+    path = dataset(vertical)
+    spec = registry.VERTICALS[vertical]
+    partials = spec.partials()
+    # Chunks that split sessions and days
+    streamed = streaming.run(path, partials, spec.columns(), spec.event_types(), chunksize=700)
+    in_memory = planner.run(spec.load(path)[0], {name: spec.funcs()[name] for name in partials})
+    assert figures(streamed) == figures(in_memory)